@@ -0,0 +1,44 @@
+# Blackjack in the terminal (or over TCP), plus the tools built around it:
+# simulators, exact strategy tables, bankroll math, benchmarks and a deck API stand-in.
+#
+#   python -m blackjack play | simulate | serve | bench ...    (see __main__.py)
+#
+# Nothing gets imported until it's used. `import blackjack` loads none of the modules, and
+# blackjack.Game, blackjack.simulation and the like load theirs the first time they're touched,
+# so a tool that only needs the simulator never pulls in the game, requests or NumPy.
+
+# name -> the module it comes from
+_EXPORTS = {
+    'Deck': 'game',
+    'Player': 'game',
+    'Dealer': 'game',
+    'Game': 'game',
+    'play': 'game',
+    'TableGame': 'table',
+    'Hand': 'hand',
+    'Simulator': 'simulation',
+    'Stats': 'simulation',
+    'simulate': 'simulation',
+    'basic_strategy': 'simulation',
+}
+
+_MODULES = {
+    'analysis', 'bankroll', 'bench', 'counting', 'deck_api', 'deck_pool', 'deck_server', 'game', 'hand',
+    'history', 'jobs', 'metrics', 'parallel', 'render', 'server', 'shoe', 'simulation', 'table', 'tables', 'terminal', 'vectorized',
+}
+
+
+def __getattr__(name):
+    import importlib
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    elif name in _MODULES:
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | _MODULES)
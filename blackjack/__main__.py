@@ -0,0 +1,37 @@
+import argparse
+import importlib
+import sys
+
+# python -m blackjack <command> [options]     (python -m blackjack <command> --help for its options)
+#
+# A command's module is only imported once it's been picked, so getting going costs about
+# what starting Python does: play never loads NumPy, simulate never loads requests, and so on.
+
+# command -> (module with a main(argv), what it does)
+COMMANDS = {
+    'play': ('game', "play in this terminal"),
+    'simulate': ('simulation', "play lots of hands with no I/O and print the stats"),
+    'job': ('jobs', "long simulations that checkpoint themselves and can be resumed"),
+    'serve': ('server', "host tables over TCP"),
+    'bench': ('bench', "run or compare the benchmarks"),
+    'bankroll': ('bankroll', "risk of ruin for a bankroll and a betting rule"),
+    'deck-server': ('deck_server', "run (or load test) a stand-in for the deck API"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m blackjack', formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Blackjack, and the tools that go with it.",
+        epilog='commands:\n' + '\n'.join(f'  {name:<13} {help}' for name, (_, help) in COMMANDS.items()))
+    parser.add_argument('command', choices=COMMANDS, metavar='command', help="one of the commands below")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="passed on to the command")
+    args = parser.parse_args(argv)
+    module = importlib.import_module(f'.{COMMANDS[args.command][0]}', __package__)
+#     so the command's own --help and errors say how it was run
+    sys.argv[0] = f'{parser.prog} {args.command}'
+    return module.main(args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+from functools import lru_cache
+
+from .simulation import DOUBLE, HIT, STAND
+
+# Exact odds for the game's rules, worked out by going through every card that could come next
+# instead of playing hands at random (see simulation.py for the rules themselves).
+#
+# A shoe is a tuple of how many of each card value are left: (aces, 2s, ..., 9s, 10/J/Q/K).
+# Every recursion is memoized on (what's left in the shoe, hand state), so a whole
+# basic-strategy table only takes a few seconds.
+#
+# The tables are per (player total, soft?, dealer upcard) and start from the full shoe minus the upcard,
+# then take out every card the player and dealer draw from there. The player's first two cards
+# aren't taken out, since a total doesn't say which two cards made it.
+
+# cards of each value (ace, 2-9, ten) in one deck
+DECK = (4, 4, 4, 4, 4, 4, 4, 4, 4, 16)
+
+# where each dealer result goes in an outcome tuple
+OUTCOMES = (17, 18, 19, 20, 21, 'bust', 'blackjack')
+BUST = 5
+BLACKJACK = 6
+
+# upcard values the way simulation.py counts them (ace is 11)
+UPCARDS = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11)
+
+
+def shoe(deck_count=1):
+    return tuple(count * deck_count for count in DECK)
+
+
+def _take(comp, i):
+    return comp[:i] + (comp[i] - 1,) + comp[i + 1:]
+
+
+def _index(upcard):
+    """ Upcard value (2-11) -> shoe index. """
+    return 0 if upcard == 11 else upcard - 1
+
+
+def _settle(res, best, two_cards, p):
+    """ Adds chance 'p' of the dealer standing on 'best' into res. """
+    if best > 21:
+        res[BUST] += p
+    elif best == 21 and two_cards:
+        res[BLACKJACK] += p
+    else:
+        res[best - 17] += p
+
+
+@lru_cache(maxsize=None)
+def _dealer(comp, hard, ace, one_card):
+    """ Chances of each dealer result (see OUTCOMES) from here.
+        hard = total with aces as 1, ace = has an ace, one_card = only the upcard so far """
+    res = [0.0] * 7
+    best = hard + 10 if ace and hard <= 11 else hard
+    if best >= 17:
+        _settle(res, best, not one_card, 1.0)
+        return tuple(res)
+    total = sum(comp)
+    for i, count in enumerate(comp):
+        if not count:
+            continue
+        p = count / total
+        new_hard = hard + i + 1
+        new_ace = ace or i == 0
+        best = new_hard + 10 if new_ace and new_hard <= 11 else new_hard
+        if best >= 17:
+#             dealer stands here, no need to go any further
+            _settle(res, best, one_card, p)
+            continue
+        sub = _dealer(_take(comp, i), new_hard, new_ace, False)
+        for k in range(7):
+            res[k] += p * sub[k]
+    return tuple(res)
+
+
+@lru_cache(maxsize=None)
+def dealer_distribution(comp, upcard):
+    """ Chances of each dealer result for an upcard (2-11), with 'comp' left in the shoe (upcard already out).
+        With an ace up the dealer has already checked for a Blackjack before anyone plays,
+        so this is only over the hole cards that aren't a ten. """
+    u = _index(upcard)
+    if u != 0:
+        return _dealer(comp, u + 1, False, True)
+    res = [0.0] * 7
+    total = sum(comp) - comp[9]
+    for i, count in enumerate(comp[:9]):
+        if count:
+            sub = _dealer(_take(comp, i), 2 + i, True, False)
+            for k in range(7):
+                res[k] += count / total * sub[k]
+    return tuple(res)
+
+
+@lru_cache(maxsize=None)
+def _stand(comp, total, upcard):
+    """ EV (in bets) of standing on 'total'. """
+    if total > 21:
+        return -1.0
+    dist = dealer_distribution(comp, upcard)
+    ev = dist[BUST] - dist[BLACKJACK]
+    for k in range(5):
+        dealer = 17 + k
+        if total > dealer:
+            ev += dist[k]
+        elif total < dealer:
+            ev -= dist[k]
+    return ev
+
+
+@lru_cache(maxsize=None)
+def _evs(comp, hard, ace, upcard):
+    """ (stand, hit, double) EVs for a hand. Like simulation.basic_strategy, doubling
+        is only counted as a first decision, so after a hit it's just hit or stand from there. """
+    best = hard + 10 if ace else hard
+    total = sum(comp)
+    hit = 0.0
+    double = 0.0
+    for i, count in enumerate(comp):
+        if not count:
+            continue
+        p = count / total
+        new_hard = hard + i + 1
+        if new_hard > 21:
+            hit -= p
+            double -= 2 * p
+            continue
+        new_ace = (ace or i == 0) and new_hard <= 11
+        sub = _take(comp, i)
+        hit += p * max(_evs(sub, new_hard, new_ace, upcard)[:2])
+        double += 2 * p * _stand(sub, new_hard + 10 if new_ace else new_hard, upcard)
+    return _stand(comp, best, upcard), hit, double
+
+
+def _hand_state(total, soft):
+    """ (total, soft) -> (hard total, has a usable ace) """
+    return (total - 10, True) if soft else (total, False)
+
+
+def dealer_outcomes(upcard, deck_count=1):
+    """ Returns {17: p, ..., 21: p, 'bust': p, 'blackjack': p} for a dealer upcard (2-11, ace is 11). """
+    comp = _take(shoe(deck_count), _index(upcard))
+    return dict(zip(OUTCOMES, dealer_distribution(comp, upcard)))
+
+
+def hand_evs(total, soft, upcard, deck_count=1):
+    """ Returns {STAND: ev, HIT: ev, DOUBLE: ev} (in bets) for a player total against an upcard. """
+    comp = _take(shoe(deck_count), _index(upcard))
+    hard, ace = _hand_state(total, soft)
+    stand, hit, double = _evs(comp, hard, ace, upcard)
+    return {STAND: stand, HIT: hit, DOUBLE: double}
+
+
+def strategy_table(deck_count=1):
+    """ Returns {(total, soft, upcard): (best action, {action: ev})} for every hand worth deciding on:
+        hard 4-21 and soft 12-21, against every upcard. """
+    table = {}
+    for upcard in UPCARDS:
+        for soft in (False, True):
+            for total in range(12 if soft else 4, 22):
+                evs = hand_evs(total, soft, upcard, deck_count)
+                table[total, soft, upcard] = (max(evs, key=evs.get), evs)
+    return table
+
+
+class TablePolicy:
+    """ A simulation policy (same arguments as simulation.basic_strategy) that looks its decisions up in a strategy table.
+        Hands the table doesn't cover (like a soft total under 12, which can't happen) are STAND, as in tables.StrategyTable. """
+
+    def __init__(self, table):
+        self.first = {}
+        self.later = {}
+        for key, (action, evs) in table.items():
+            self.first[key] = action
+            self.later[key] = HIT if evs[HIT] > evs[STAND] else STAND
+
+    def __call__(self, total, soft, upcard, first):
+        return (self.first if first else self.later).get((total, soft, upcard), STAND)
+
+
+def clear_cache():
+    """ Frees the memoized results (they can take a lot of memory for big shoes). """
+    for func in (_dealer, dealer_distribution, _stand, _evs):
+        func.cache_clear()
+
+
+def print_table(table):
+    """ Prints a strategy table as the usual chart: rows are player totals, columns are upcards. """
+    print("      " + " ".join(f"{'A' if up == 11 else up:>2}" for up in UPCARDS))
+    for soft in (False, True):
+        for total in range(12 if soft else 5, 22):
+            label = f"{'S' if soft else 'H'}{total:>2}"
+            print(f"{label:<5} " + " ".join(f"{table[total, soft, up][0].upper():>2}" for up in UPCARDS))
+
+
+if __name__ == "__main__":
+    import sys
+    print_table(strategy_table(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
@@ -0,0 +1,302 @@
+import numpy as np
+
+from .counting import HI_LO
+from .simulation import Simulator
+
+# How long does a wallet last? Instead of replaying hands one by one, this takes the chances of
+# each result of a hand (lose 2 bets, lose 1, push, win 1, win 1.5, ...) and plays lots of
+# bankroll paths side by side as NumPy arrays: each path is a player sitting down with the same
+# wallet and betting by the same rule until they go broke, hit their goal, or the session ends.
+#
+# Results of a hand come in bets (what the hand paid per unit bet), and can depend on the true
+# count at the start of the hand (see counting.py), which is what count-based betting needs.
+# Hands are treated as independent of each other, apart from the count.
+#
+# Bets aren't shrunk to fit what's left in the wallet: a path is broke (ruined) as soon as
+# it has less than the minimum bet, same as Player.place_bet won't take a bet under it.
+
+# the game's minimum bet (see Player.place_bet)
+MIN_BET = 5
+
+# Hi-Lo tag by card value (2-11, see simulation.py), for counting the simulator's cards
+TAGS_BY_VALUE = {value: HI_LO[value - 1] for value in range(2, 11)}
+TAGS_BY_VALUE[11] = HI_LO[0]
+
+
+class Outcomes:
+    """ The chances of every result of a hand, in bets.
+            values = every possible result (e.g. -2, -1, 0, 1, 1.5, 2)
+            probs = (counts, values) chances, one row per true count in 'counts'
+                    (each row is the chances given that count, plus how often that count comes up)
+            counts = the true count each row is for (just [0] when the count doesn't matter) """
+
+    def __init__(self, values, probs, counts=(0,)):
+        self.values = np.asarray(values, dtype=np.float64)
+        probs = np.asarray(probs, dtype=np.float64).reshape(len(counts), len(self.values))
+        self.probs = probs / probs.sum()
+        self.counts = np.asarray(counts, dtype=np.int64)
+        # for drawing (count, result) pairs in one go
+        self.cdf = np.cumsum(self.probs.ravel())
+        self.cdf[-1] = 1.0
+
+    @property
+    def count_probs(self):
+        """ How often each true count comes up. """
+        return self.probs.sum(axis=1)
+
+    @property
+    def ev(self):
+        """ Average result per hand, in bets (at a flat bet). """
+        return float((self.probs.sum(axis=0) * self.values).sum())
+
+    def sample(self, rng, shape):
+        """ Draws results for 'shape' hands and returns (true counts, results in bets). """
+        picks = np.searchsorted(self.cdf, rng.random(shape), side='right')
+        picks = np.minimum(picks, self.cdf.size - 1)
+        count_rows, value_cols = np.divmod(picks, len(self.values))
+        return self.counts[count_rows], self.values[value_cols]
+
+    @classmethod
+    def from_counts(cls, tally, counts=(0,)):
+        """ Takes {(true count, result in bets): number of hands} and returns the Outcomes. """
+        values = sorted({value for _, value in tally})
+        column = {value: i for i, value in enumerate(values)}
+        row = {count: i for i, count in enumerate(counts)}
+        probs = np.zeros((len(counts), len(values)))
+        for (count, value), hands in tally.items():
+            probs[row[count], column[value]] += hands
+        return cls(values, probs, counts)
+
+    @classmethod
+    def from_simulation(cls, hands=1_000_000, seed=None, **rules):
+        """ Plays 'hands' hands with simulation.Simulator (same rules/policy arguments) and
+            returns how often each result came up. """
+        sim = Simulator(seed=seed, **rules)
+        tally = {}
+        play_hand = sim.play_hand
+        for _ in range(hands):
+            key = (0, play_hand() / 2)
+            tally[key] = tally.get(key, 0) + 1
+        return cls.from_counts(tally)
+
+    @classmethod
+    def by_count(cls, hands=1_000_000, deck_count=6, penetration=0.75, max_count=5, seed=None, **rules):
+        """ Plays 'hands' hands from a shoe that's dealt down to the cut card, and returns the
+            results split up by the (Hi-Lo) true count at the start of each hand, rounded down
+            and capped at +-max_count. """
+        sim = Simulator(seed=seed, deck_count=deck_count, penetration=penetration, **rules)
+        cards = sim.cards
+        tally = {}
+        running = 0
+        play_hand = sim.play_hand
+        size = sim.size
+        for _ in range(hands):
+            if sim.pos >= sim.cut:
+#                 play_hand is about to reshuffle
+                running = 0
+                start = 0
+            else:
+                start = sim.pos
+            true_count = int(np.floor(running * 52 / max(size - start, 26)))
+            true_count = max(-max_count, min(max_count, true_count))
+            key = (true_count, play_hand() / 2)
+            tally[key] = tally.get(key, 0) + 1
+            if sim.pos < start:
+#                 the shoe ran out partway through the hand and was reshuffled
+                running = 0
+                start = 0
+            for value in cards[start:sim.pos]:
+                running += TAGS_BY_VALUE[value]
+        return cls.from_counts(tally, counts=range(-max_count, max_count + 1))
+
+    @classmethod
+    def from_history(cls, path):
+        """ The results of the hands in a hand history log (see history.py), per unit bet. """
+        from .history import HistoryReader
+        reader = HistoryReader(path)
+        bets = reader['bet'].astype(np.float64)
+        played = bets > 0
+        results = np.round(reader['net'][played] / bets[played] * 4) / 4
+        values, hands = np.unique(results, return_counts=True)
+        reader.close()
+        return cls(values, hands)
+
+
+class Flat:
+    """ Bets the same every hand: 'units' minimum bets. """
+    stateless = True
+
+    def __init__(self, units=1):
+        self.units = units
+
+    def bet_units(self, counts):
+        return np.full(counts.shape, self.units, dtype=np.float64)
+
+
+class CountSpread:
+    """ Bets by the true count: spread = {true count: units}. Counts below the lowest one in
+        the spread bet that lowest amount, counts above the highest bet the highest. """
+    stateless = True
+
+    def __init__(self, spread):
+        self.low = min(spread)
+        high = max(spread)
+        table = []
+        units = spread[self.low]
+        for count in range(self.low, high + 1):
+            units = spread.get(count, units)
+            table.append(units)
+        self.table = np.array(table, dtype=np.float64)
+
+    def bet_units(self, counts):
+        return self.table[np.clip(counts - self.low, 0, len(self.table) - 1)]
+
+
+class Progression:
+    """ Changes the bet after every hand: multiplies it by 'on_loss' after a loss, and goes back
+        to 'base' units after a win (or multiplies by 'on_win', if given), never over 'max_units'.
+        on_loss=2 is a Martingale; on_loss=1, on_win=2 is a Paroli. """
+    stateless = False
+
+    def __init__(self, on_loss=2, on_win=None, base=1, max_units=100):
+        self.on_loss = on_loss
+        self.on_win = on_win
+        self.base = base
+        self.max_units = max_units
+
+    def next_units(self, units, results):
+        if self.on_win is None:
+            after_win = np.full_like(units, self.base)
+        else:
+            after_win = units * self.on_win
+#             a Paroli-style run starts over once it's hit the max
+            after_win = np.where(after_win > self.max_units, self.base, after_win)
+        units = np.where(results < 0, np.minimum(units * self.on_loss, self.max_units),
+                         np.where(results > 0, after_win, units))
+        return units
+
+
+def _report(start, bank, ruined, reached, played, max_drawdown, goal):
+    quantiles = (0.5, 0.9, 0.99)
+    res = {
+        'paths': len(bank),
+        'risk_of_ruin': float(ruined.mean()),
+        'session_hands_mean': float(played.mean()),
+        'session_hands_quantiles': dict(zip(quantiles, np.quantile(played, quantiles).tolist())),
+        'max_drawdown_quantiles': dict(zip(quantiles, np.quantile(max_drawdown, quantiles).tolist())),
+        'final_bankroll_mean': float(np.maximum(bank, 0).mean()),
+        'final_bankroll_quantiles': dict(zip(quantiles, np.quantile(np.maximum(bank, 0), quantiles).tolist())),
+        'net_mean': float((np.maximum(bank, 0) - start).mean()),
+    }
+    if goal is not None:
+        res['goal_rate'] = float(reached.mean())
+    return res
+
+
+def simulate(outcomes, rule=None, bankroll=100, min_bet=MIN_BET, hands=1000, paths=10000,
+             goal=None, seed=None):
+    """ Plays 'paths' sessions of up to 'hands' hands, each starting with 'bankroll' dollars and
+        betting 'rule' (Flat, CountSpread or Progression) times the minimum bet.
+        A session ends early when it can't cover the minimum bet (ruin) or reaches 'goal' dollars.
+        Returns risk of ruin, session length, drawdown and final bankroll stats as a dict. """
+    rule = rule or Flat()
+    rng = np.random.default_rng(seed)
+    bank = np.full(paths, float(bankroll))
+    peak = bank.copy()
+    max_drawdown = np.zeros(paths)
+    alive = np.ones(paths, dtype=bool)
+    ruined = np.zeros(paths, dtype=bool)
+    reached = np.zeros(paths, dtype=bool)
+    played = np.zeros(paths, dtype=np.int64)
+
+    if not rule.stateless:
+        units = np.full(paths, float(rule.base))
+        for _ in range(hands):
+            counts, results = outcomes.sample(rng, paths)
+            bank += np.where(alive, units * min_bet * results, 0.0)
+            played += alive
+            np.maximum(peak, bank, out=peak)
+            np.maximum(max_drawdown, peak - bank, out=max_drawdown)
+            broke = alive & (bank < min_bet)
+            done = alive & (bank >= goal) if goal is not None else np.zeros(paths, dtype=bool)
+            ruined |= broke
+            reached |= done
+            alive &= ~(broke | done)
+            units = rule.next_units(units, results)
+            if not alive.any():
+                break
+        return _report(bankroll, bank, ruined, reached, played, max_drawdown, goal)
+
+#     nothing about the bet depends on how the last hand went, so a whole block of hands
+#     can be drawn and added up at once (keeping each block to a few million numbers)
+    block = max(1, min(hands, 2_000_000 // paths))
+    rows = np.arange(block)[:, None]
+    columns = np.arange(paths)
+    for first_hand in range(0, hands, block):
+        n = min(block, hands - first_hand)
+        counts, results = outcomes.sample(rng, (n, paths))
+        path = bank + np.cumsum(rule.bet_units(counts) * min_bet * results * alive, axis=0)
+        broke = path < min_bet
+        stop = broke | (path >= goal) if goal is not None else broke
+        stopped = stop.any(axis=0) & alive
+        when = stop.argmax(axis=0)
+#         after a path stops, it stays where it stopped
+        frozen = stopped & (rows[:n] > when)
+        path = np.where(frozen, path[when, columns], path)
+        running_peak = np.maximum(peak, np.maximum.accumulate(path, axis=0))
+        np.maximum(max_drawdown, (running_peak - path).max(axis=0), out=max_drawdown)
+        peak = running_peak[-1]
+        played += np.where(stopped, when + 1, n * alive)
+        ruined |= stopped & broke[when, columns]
+        reached |= stopped & ~broke[when, columns]
+        alive &= ~stopped
+        bank = path[-1]
+        if not alive.any():
+            break
+    return _report(bankroll, bank, ruined, reached, played, max_drawdown, goal)
+
+
+def main(argv=None):
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Risk of ruin and drawdowns for a wallet and a betting rule.")
+    parser.add_argument('--bankroll', type=float, default=100)
+    parser.add_argument('--hands', type=int, default=1000, help="longest session, in hands")
+    parser.add_argument('--paths', type=int, default=10000, help="sessions to simulate")
+    parser.add_argument('--goal', type=float, help="stop once the wallet reaches this")
+    parser.add_argument('--rule', choices=('flat', 'count', 'martingale', 'paroli'), default='flat')
+    parser.add_argument('--units', type=float, default=1, help="flat bet, in minimum bets")
+    parser.add_argument('--spread', default="1:1,2:2,3:4,4:8", help="count bets as count:units,...")
+    parser.add_argument('--max-units', type=float, default=32, help="biggest progression bet")
+    parser.add_argument('--decks', type=int, default=6)
+    parser.add_argument('--sim-hands', type=int, default=1_000_000, help="hands to simulate for the outcome chances")
+    parser.add_argument('--history', metavar='FILE', help="use the results in a hand history log instead")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.history:
+        outcomes = Outcomes.from_history(args.history)
+    elif args.rule == 'count':
+        outcomes = Outcomes.by_count(args.sim_hands, deck_count=args.decks, seed=args.seed)
+    else:
+        outcomes = Outcomes.from_simulation(args.sim_hands, seed=args.seed, deck_count=args.decks)
+    if args.rule == 'flat':
+        rule = Flat(args.units)
+    elif args.rule == 'count':
+        rule = CountSpread({int(count): float(units) for count, units in
+                            (pair.split(':') for pair in args.spread.split(','))})
+    elif args.rule == 'martingale':
+        rule = Progression(on_loss=2, max_units=args.max_units)
+    else:
+        rule = Progression(on_loss=1, on_win=2, max_units=args.max_units)
+    res = simulate(outcomes, rule, args.bankroll, MIN_BET, args.hands, args.paths, args.goal, args.seed)
+    res['ev_per_hand'] = outcomes.ev
+    res['seconds'] = time.perf_counter() - started
+    print(json.dumps(res, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# Benchmarks for the hot paths, so slowdowns get caught before they ship.
+#
+#   python -m blackjack bench run --out baseline.json           (after a change:)
+#   python -m blackjack bench run --out new.json
+#   python -m blackjack bench compare baseline.json new.json    (exits 1 if anything got slower than --threshold)
+#
+# Cards come through the game's deck client (Deck, with its buffer, background refill and pooled
+# session) from a deckofcardsapi.com stand-in (deck_server.py) started right here, so the client gets
+# measured too but not the internet. --api-url points it at some other stand-in instead, and
+# --in-memory skips the client and draws straight from the in-memory shoe (shoe.py), so the numbers
+# are only about our own code.
+#
+# Every number is the best of --repeat runs. Only compare results from the same machine (compare
+# refuses results with a different backend, CPU count or Python version unless it's --force'd), and on a
+# busy or shared one, turn up --repeat (or --threshold) before trusting a REGRESSION.
+
+# name -> (unit, higher is better)
+UNITS = {
+    'draw': ('draws/s', True),
+    'evaluate_card': ('cards/s', True),
+    'card_suit': ('cards/s', True),
+    'card_from_api': ('cards/s', True),
+    'render_full': ('us/frame', False),
+    'render_diff': ('us/frame', False),
+    'hands': ('hands/s', True),
+    'peak_memory': ('KiB', False),
+    'memory_growth': ('KiB', False),
+}
+
+# changes smaller than this don't count as a regression, however big they are in % (memory_growth
+# is usually about 0, so any change would be a huge percentage)
+FLOORS = {'memory_growth': 64}
+
+# how the scripted player answers each prompt
+ANSWERS = {'bet': '5', 'insurance': 'n', 'insurance amount': '0', 'play again': 'y'}
+
+
+class _Sink:
+    """ Swallows output (print and the screen), so the terminal isn't what gets measured. """
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _game():
+    """ A Game with a rich scripted player that hits below 17, drawing to nowhere. """
+    from . import game as bj
+    from . import render
+    from .terminal import Terminal
+
+    player = bj.Player(None, 10 ** 12, 0)
+    dealer = bj.Dealer(None, player)
+    dealer.screen = render.Screen(Terminal(_Sink(), ansi=True))
+    game = bj.Game(dealer, player, pace=0)
+    return game, player
+
+
+def _play(game, player, hands):
+    """ Plays 'hands' rounds with scripted answers. """
+    played = 0
+    while played < hands:
+        phase = game.phase
+        if game.prompt is None:
+            game.step()
+        elif phase == 'player turn':
+            game.step('h' if player.hand_val < 17 else 's')
+        else:
+            if phase == 'play again':
+                played += 1
+            game.step(ANSWERS[phase])
+
+
+def _rate(func, count, repeat):
+    """ Best-of-'repeat' rate of func(), which does 'count' things. """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def bench_draw(scale, repeat):
+    from . import game as bj
+
+    deck = bj.Deck(bj.get_new_deck_id())
+#     API round trips are thousands of times slower than the in-memory shoe
+    rounds = (500 if deck.shoe is not None else 5) * scale
+
+    def draw():
+        for _ in range(rounds):
+#             a fresh deck's worth, one card at a time like the game does
+            if deck.shoe is not None:
+                deck.shoe.shuffle()
+            else:
+                deck.reshuffle()
+            for _ in range(52):
+                deck.draw(1)
+
+    with contextlib.redirect_stdout(_Sink()):
+        rate = _rate(draw, rounds * 52, repeat)
+    deck.close()
+    return rate
+
+
+def _api_cards():
+    from . import shoe
+    return [{'cards': [shoe.card_dict(card)]} for card in range(52)]
+
+
+def bench_evaluate_card(scale, repeat):
+    from . import game as bj
+    cards = _api_cards() * 2000 * scale
+    evaluate = bj.Deck.evaluate_card
+    return _rate(lambda: [evaluate(None, card) for card in cards], len(cards), repeat)
+
+
+def bench_card_suit(scale, repeat):
+    from . import game as bj
+    cards = _api_cards() * 2000 * scale
+    suit = bj.Deck.card_suit
+    return _rate(lambda: [suit(None, card) for card in cards], len(cards), repeat)
+
+
+def bench_card_from_api(scale, repeat):
+    from .hand import card_from_api
+    cards = _api_cards() * 2000 * scale
+    return _rate(lambda: [card_from_api(card) for card in cards], len(cards), repeat)
+
+
+def _frames():
+    """ The frames of a typical round: cards coming out one at a time, then the dealer's turn. """
+    from . import game as bj
+    from .hand import Hand
+
+    player = bj.Player(None, 100, 5)
+    dealer = bj.Dealer(None, player)
+    frames = []
+    for card in (0, 16, 29, 45):
+        (player.hand if len(player.hand) <= len(dealer.hand) else dealer.hand).add(card)
+        frames.append(dealer.hand_lines(False) + player.hand_lines(False))
+    player.hand.add(7)
+    frames.append(dealer.hand_lines(False) + player.hand_lines(False))
+    dealer.hand = Hand([16, 45, 3])
+    frames.append(dealer.hand_lines(True) + player.hand_lines(False))
+    return frames
+
+
+def bench_render_full(scale, repeat):
+    from . import render
+    from .terminal import Terminal
+    frames = _frames()
+    screen = render.Screen(Terminal(_Sink(), ansi=True))
+    count = 20000 * scale
+
+    def draw():
+        for i in range(count):
+            screen.reset()
+            screen.draw(frames[i % len(frames)])
+
+    return 1e6 / _rate(draw, count, repeat)
+
+
+def bench_render_diff(scale, repeat):
+    from . import render
+    from .terminal import Terminal
+    frames = _frames()
+    screen = render.Screen(Terminal(_Sink(), ansi=True))
+    count = 20000 * scale
+
+    def draw():
+        for i in range(count):
+            screen.draw(frames[i % len(frames)])
+
+    return 1e6 / _rate(draw, count, repeat)
+
+
+def bench_hands(scale, repeat):
+    from . import game as bj
+    game, player = _game()
+    hands = (200 if bj.DECK_BACKEND == "local" else 10) * scale
+    with contextlib.redirect_stdout(_Sink()):
+#         warm up (first deck, pool threads)
+        _play(game, player, 10)
+        return _rate(lambda: _play(game, player, hands), hands, repeat)
+
+
+def _memory(hands):
+    """ (peak KiB over a long session, KiB still held at the end that wasn't after the first 1000 hands) """
+    game, player = _game()
+    with contextlib.redirect_stdout(_Sink()):
+        _play(game, player, 10)
+        gc.collect()
+        tracemalloc.start()
+        _play(game, player, 1000)
+        gc.collect()
+        early = tracemalloc.get_traced_memory()[0]
+        _play(game, player, hands)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak / 1024, max(current - early, 0) / 1024
+
+
+BENCHMARKS = {
+    'draw': bench_draw,
+    'evaluate_card': bench_evaluate_card,
+    'card_suit': bench_card_suit,
+    'card_from_api': bench_card_from_api,
+    'render_full': bench_render_full,
+    'render_diff': bench_render_diff,
+    'hands': bench_hands,
+}
+
+
+def run(only=None, scale=1, repeat=5, memory_hands=5000):
+    """ Runs the benchmarks (all of them, or just the names in 'only') and returns {name: value}. """
+    results = {}
+    for name, func in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        results[name] = func(scale, repeat)
+        print(f"{name:<15} {results[name]:>14,.1f} {UNITS[name][0]}", file=sys.stderr)
+    if not only or {'peak_memory', 'memory_growth'} & set(only):
+        results['peak_memory'], results['memory_growth'] = _memory(memory_hands * scale)
+        for name in ('peak_memory', 'memory_growth'):
+            print(f"{name:<15} {results[name]:>14,.1f} {UNITS[name][0]}", file=sys.stderr)
+    return results
+
+
+def report(results, backend):
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'backend': backend,
+        },
+        'results': {name: {'value': value, 'unit': UNITS[name][0]} for name, value in results.items()},
+    }
+
+
+# results that differ in any of these weren't measured the same way, so comparing them means nothing
+COMPARABLE = ('backend', 'cpus', 'python')
+
+
+def mismatches(old, new):
+    """ Returns the COMPARABLE meta fields that differ between two results, as {name: (old, new)}. """
+    return {name: (old['meta'].get(name), new['meta'].get(name)) for name in COMPARABLE
+            if old['meta'].get(name) != new['meta'].get(name)}
+
+
+def compare(old, new, threshold=0.1):
+    """ Prints old vs new for every benchmark in both, and returns the names that got
+        more than 'threshold' (a fraction) worse. """
+    regressions = []
+    print(f"{'benchmark':<15} {'old':>14} {'new':>14} {'change':>8}")
+    for name, entry in old['results'].items():
+        if name not in new['results']:
+            continue
+        before = entry['value']
+        after = new['results'][name]['value']
+        higher_is_better = UNITS.get(name, (None, True))[1]
+        base = max(abs(before), FLOORS.get(name, 0))
+        if base:
+            change = (after - before) / base
+            worse = -change if higher_is_better else change
+        else:
+            change = worse = 0.0
+        flag = ''
+        if worse > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<15} {before:>14,.1f} {after:>14,.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="run the benchmarks and save the results as JSON")
+    run_parser.add_argument('--out', help="where to save the results (default: print them)")
+    run_parser.add_argument('--only', nargs='+', choices=UNITS, help="just these benchmarks")
+    run_parser.add_argument('--scale', type=int, default=1, help="make every benchmark this many times longer")
+    run_parser.add_argument('--repeat', type=int, default=5, help="runs per benchmark (best one counts)")
+    run_parser.add_argument('--api-url', default='local',
+                            help="draw from a deckofcardsapi.com stand-in at this URL ('local' starts one in this process)")
+    run_parser.add_argument('--in-memory', action='store_true', help="draw straight from the in-memory shoe, skipping the deck client")
+    compare_parser = commands.add_parser('compare', help="compare two saved results")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help="how much worse (0.1 = 10%%) counts as a regression")
+    compare_parser.add_argument('--force', action='store_true', help="compare even if the backend, CPUs or Python version differ")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        different = mismatches(old, new)
+        if different:
+            for name, (before, after) in different.items():
+                print(f"{name} differs: {before} vs {after}", file=sys.stderr)
+            if not args.force:
+                print("These results weren't measured the same way, so they can't be compared "
+                      "(--force to compare them anyway).", file=sys.stderr)
+                return 2
+            print("WARNING: comparing results that weren't measured the same way.", file=sys.stderr)
+        return 1 if compare(old, new, args.threshold) else 0
+
+#     has to be set up before the game is imported (it reads these when it's imported)
+    os.environ.setdefault('BLACKJACK_SEED', '0')
+    os.environ.pop('BLACKJACK_METRICS', None)
+    server = None
+    if args.in_memory:
+        os.environ['BLACKJACK_DECK_BACKEND'] = 'local'
+        backend = 'in-memory'
+    else:
+        url = args.api_url
+        if url == 'local':
+            from .deck_server import DeckBackend, start_in_background
+            server, url = start_in_background(DeckBackend(int(os.environ['BLACKJACK_SEED'])))
+        os.environ['BLACKJACK_DECK_BACKEND'] = 'remote'
+        os.environ['BLACKJACK_API_URL'] = url
+        backend = args.api_url
+    try:
+        results = report(run(args.only, args.scale, args.repeat), backend)
+    finally:
+        if server is not None:
+            server.shutdown()
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# Card counting. Every card that comes out of the shoe adds its tag to a running count,
+# and the true count is that divided by how many decks are left, so it means the same thing
+# whether the shoe has 1 deck or 8. A high true count means the shoe is rich in tens and aces,
+# which is good for the player.
+
+# Hi-Lo tags by rank (ACE, 2-10, JACK, QUEEN, KING): 2-6 are +1, 7-9 are 0, tens and aces are -1
+HI_LO = (-1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1)
+
+
+class Counter:
+    """ Keeps the count for one shoe. Every update and every lookup is O(1).
+            deck_count = decks in the shoe
+            tags = what each rank adds to the running count (HI_LO by default) """
+    __slots__ = ('deck_count', 'tags', 'running', 'seen')
+
+    def __init__(self, deck_count=1, tags=HI_LO):
+        self.deck_count = deck_count
+        self.tags = tags
+        self.running = 0
+        self.seen = 0
+
+    def see(self, card):
+        """ Counts an int card (0-51). """
+        self.running += self.tags[card % 13]
+        self.seen += 1
+
+    def reset(self):
+        """ Starts over (the shoe got shuffled). """
+        self.running = 0
+        self.seen = 0
+
+    @property
+    def decks_left(self):
+        """ Decks still in the shoe (never less than half a deck, so the true count can't blow up at the end). """
+        return max((52 * self.deck_count - self.seen) / 52, 0.5)
+
+    @property
+    def true_count(self):
+        return self.running / self.decks_left
+
+    def __repr__(self):
+        return f"Counter(running={self.running}, true={self.true_count:+.1f}, seen={self.seen})"
@@ -0,0 +1,45 @@
+import os
+
+from . import metrics
+
+# Everything that talks to deckofcardsapi.com goes through here,
+# so every call reuses the same pooled keep-alive connections
+# instead of setting up a new TCP/TLS connection per card.
+# requests is only imported (and the session made) on the first call, so nothing
+# that plays from the local shoe pays for it.
+
+API_URL = os.environ.get("BLACKJACK_API_URL", "https://www.deckofcardsapi.com/api/deck")
+TIMEOUT = 10
+
+_session = None
+
+
+def session():
+    """ The shared requests.Session, made the first time it's needed. """
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _session = requests.Session()
+        _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return _session
+
+
+def get(path, **params):
+    """ GETs 'path' (relative to API_URL) and returns the JSON, or None if the API said no.
+            get("new/shuffle/", deck_count=1) = a new shuffled deck
+            get(f"{deck_id}/draw/", count=4) = draw 4 cards """
+    action = 'new' if path.startswith('new') else path.strip('/').rpartition('/')[2]
+    http = session()
+    metrics.count('api_calls', action=action)
+#     every requests error is an OSError, so this doesn't need requests imported up top
+    try:
+        with metrics.timer('api_seconds', action=action):
+            res = http.get(f"{API_URL}/{path}", params=params or None, timeout=TIMEOUT)
+    except OSError:
+        metrics.count('api_errors', action=action)
+        raise
+    if res.ok:
+        return res.json()
+    metrics.count('api_errors', action=action)
@@ -0,0 +1,80 @@
+import queue
+import threading
+from collections import deque
+
+# Keeps a few shuffled decks ready to go, so a new round can start
+# without waiting on the API to make (or shuffle) a deck.
+# If decks keep failing to come (the API is down), whoever is waiting on one gets a DeckError
+# instead of waiting forever; the pool keeps trying in the background, in case the API comes back.
+
+
+class DeckError(Exception):
+    """ No deck could be got ready (the deck API is probably down). """
+
+
+class DeckPool:
+    """ Hands out ready, shuffled deck ids and reshuffles used ones in the background.
+            new_deck() = makes a brand-new shuffled deck and returns its id (or None if it didn't work)
+            reshuffle(deck_id) = puts a used deck's cards back and shuffles it,
+                                 returns the deck_id (or None if it didn't work)
+            max_failures = failures in a row before acquire() gives up with a DeckError """
+
+    def __init__(self, new_deck, reshuffle, size=3, workers=2, max_failures=5):
+        self.new_deck = new_deck
+        self.reshuffle = reshuffle
+        self.max_failures = max_failures
+        self.failures = 0
+        # set once max_failures is reached, cleared again when a deck comes through
+        self.error = None
+        self.ready = deque()
+        self.cond = threading.Condition()
+#         None = make a new deck, anything else = the id of a deck to reshuffle
+        self.jobs = queue.Queue()
+        for _ in range(size):
+            self.jobs.put(None)
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def acquire(self):
+        """ Returns the id of a shuffled deck nobody else is using.
+            If they're all in use, another deck gets made (the pool grows to fit
+            however many tables are playing) and this waits for it.
+            Raises DeckError if decks can't be made. """
+        with self.cond:
+            if not self.ready:
+                self.jobs.put(None)
+            while not self.ready:
+                if self.error is not None:
+                    raise self.error
+                self.cond.wait()
+            return self.ready.popleft()
+
+    def release(self, deck_id):
+        """ Gives a used deck back. It gets reshuffled and goes back in the pool. """
+        self.jobs.put(deck_id)
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            problem = "the deck API didn't answer"
+            try:
+                deck_id = self.new_deck() if job is None else self.reshuffle(job)
+            except Exception as e:
+                print(f"Error getting a deck ready: {e}")
+                problem = str(e)
+                deck_id = None
+            if deck_id is None:
+                with self.cond:
+                    self.failures += 1
+                    if self.failures >= self.max_failures and self.error is None:
+                        self.error = DeckError(f"Couldn't get a deck ready after {self.failures} tries ({problem}).")
+                        self.cond.notify_all()
+#                 try again with a brand-new deck
+                self.jobs.put(None)
+                threading.Event().wait(1)
+                continue
+            with self.cond:
+                self.failures = 0
+                self.error = None
+                self.ready.append(deck_id)
+                self.cond.notify()
@@ -0,0 +1,328 @@
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from . import shoe
+
+# A stand-in for deckofcardsapi.com that runs on this machine, for load tests and for
+# reproducing a game exactly. It answers the calls the game makes (new/shuffle, draw with a count,
+# shuffle) with the same JSON, using shoe.LocalShoe for the cards.
+#
+#   python -m blackjack deck-server serve --port 8765 --seed 42
+#   BLACKJACK_API_URL=http://127.0.0.1:8765/api/deck python -m blackjack play
+#
+# It can also sit in front of the real API and write down every call and answer (--record),
+# then play those answers back later without the real API (--replay), so a bad shuffle
+# seen once can be played again as many times as needed.
+#
+#   python -m blackjack deck-server serve --record session.jsonl
+#   python -m blackjack deck-server serve --replay session.jsonl
+#
+# And it can load-test the game's own deck client (Deck, with its buffering and pooled connections)
+# with lots of players drawing at once:
+#
+#   python -m blackjack deck-server load --clients 200 --rounds 20
+
+PREFIX = '/api/deck/'
+UPSTREAM = "https://www.deckofcardsapi.com/api/deck"
+
+
+class DeckBackend:
+    """ Answers API calls with local shoes.
+            seed = makes every new deck come out the same way each run (in the order they're made)
+            latency = seconds to wait before every answer, to act like a far-away server """
+
+    def __init__(self, seed=None, latency=0):
+        self.seeder = random.Random(seed)
+        self.latency = latency
+        self.shoes = {}
+        self.lock = threading.Lock()
+
+    def handle(self, path, params):
+        """ Returns (HTTP status, JSON) for an API path (after /api/deck/) and its query params. """
+        if self.latency:
+            time.sleep(self.latency)
+        parts = [part for part in path.split('/') if part]
+        if parts[:2] == ['new', 'shuffle'] or parts == ['new']:
+            count = int(params.get('deck_count', 1))
+            if not 1 <= count <= 20:
+                return 400, {'success': False, 'error': "deck_count has to be 1-20"}
+            with self.lock:
+                local = shoe.LocalShoe(count, self.seeder.getrandbits(64))
+                self.shoes[local.deck_id] = local
+            return 200, {'success': True, 'deck_id': local.deck_id, 'shuffled': True, 'remaining': local.remaining}
+        if len(parts) != 2 or parts[1] not in {'draw', 'shuffle', 'return'}:
+            return 404, {'success': False, 'error': f"Unknown call: {path}"}
+        local = self.shoes.get(parts[0])
+        if local is None:
+            return 404, {'success': False, 'error': "Deck ID does not exist."}
+        action = parts[1]
+        if action == 'draw':
+            action = f"draw/?count={int(params.get('count', 1))}"
+#         one deck can get calls from a few threads at once (the game's background refill)
+        with self.lock:
+            return 200, local._get(action)
+
+
+class Recorder:
+    """ Passes every call through to the real API and writes down the call and its answer (JSON lines). """
+
+    def __init__(self, path, upstream=UPSTREAM):
+        import requests
+        self.session = requests.Session()
+        self.upstream = upstream.rstrip('/')
+        self.file = open(path, 'a')
+        self.lock = threading.Lock()
+
+    def handle(self, path, params):
+        res = self.session.get(f"{self.upstream}/{path}", params=params or None, timeout=10)
+        try:
+            body = res.json()
+        except ValueError:
+            body = {'success': False, 'error': res.text}
+        with self.lock:
+            self.file.write(json.dumps({'path': path, 'params': params, 'status': res.status_code, 'body': body}) + '\n')
+            self.file.flush()
+        return res.status_code, body
+
+
+class Replayer:
+    """ Answers calls from a recording: new decks get the recorded answers in order, and the cards
+        come out exactly as they did in the recording.
+        The game makes decks ahead of time on a few threads at once, so which deck gets played first
+        can change from run to run. So cards go by when a deck is first drawn from: the first deck
+        drawn from deals what the first deck drawn from in the recording dealt, and so on.
+        Draws don't have to ask for the same number of cards as in the recording either (the game's
+        buffering doesn't always split them up the same way), since each deck's cards are replayed as one
+        stream, starting over from the next recorded shuffle whenever the deck gets shuffled. """
+
+    def __init__(self, path):
+        self.new_decks = defaultdict(deque)
+#         recorded deck_id -> what it dealt after each shuffle, and the deck's size
+        self.dealt = {}
+        self.size = {}
+#         recorded deck_ids in the order they were first drawn from
+        self.first_drawn = deque()
+#         deck_id -> [recorded deck_id it plays like, which shuffle it's on, cards dealt since]
+        self.place = {}
+        self.lock = threading.Lock()
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    self._add(json.loads(line))
+
+    def _add(self, call):
+        parts = [part for part in call['path'].split('/') if part]
+        body = call['body']
+        if parts[0] == 'new':
+            self.new_decks[tuple(sorted(call['params'].items()))].append((call['status'], body))
+            if body.get('success'):
+                self.dealt[body['deck_id']] = [[]]
+                self.size[body['deck_id']] = body['remaining']
+        elif parts[0] in self.dealt and len(parts) == 2:
+            dealt = self.dealt[parts[0]]
+            if parts[1] == 'draw':
+                if len(dealt) == 1 and not dealt[0]:
+                    self.first_drawn.append(parts[0])
+                dealt[-1].extend(body.get('cards', ()))
+            elif parts[1] in {'shuffle', 'return'}:
+                dealt.append([])
+
+    def handle(self, path, params):
+        parts = [part for part in path.split('/') if part]
+        with self.lock:
+            if parts and parts[0] == 'new':
+                answers = self.new_decks.get(tuple(sorted(params.items())))
+                if not answers:
+                    return 404, {'success': False, 'error': f"No more new decks in the recording for {params}"}
+                status, body = answers.popleft()
+                if body.get('success'):
+                    self.place[body['deck_id']] = [None, 0, 0]
+                return status, body
+            if len(parts) != 2 or parts[0] not in self.place:
+                return 404, {'success': False, 'error': f"Not in the recording: {path}"}
+            deck_id, action = parts
+            place = self.place[deck_id]
+            size = self.size[deck_id]
+            if action in {'shuffle', 'return'}:
+                if place[0] is not None:
+                    place[1] += 1
+                    place[2] = 0
+                return 200, {'success': True, 'deck_id': deck_id, 'shuffled': action == 'shuffle', 'remaining': size}
+            if action != 'draw':
+                return 404, {'success': False, 'error': f"Not in the recording: {path}"}
+            if place[0] is None:
+                if not self.first_drawn:
+                    return 404, {'success': False, 'error': "No more decks were drawn from in the recording"}
+                place[0] = self.first_drawn.popleft()
+            count = int(params.get('count', 1))
+            segments = self.dealt[place[0]]
+            recorded = segments[place[1]] if place[1] < len(segments) else []
+            cards = recorded[place[2]:place[2] + count]
+            place[2] += len(cards)
+#             like the real API: whatever's left, and success = False if that's not enough
+            res = {'success': len(cards) == count, 'deck_id': deck_id, 'cards': cards, 'remaining': size - place[2]}
+            if len(cards) < count:
+                res['error'] = "The recording doesn't go this far"
+            return 200, res
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+#     answers are tiny, so send them right away instead of waiting to fill a packet
+    disable_nagle_algorithm = True
+    backend = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if not url.path.startswith(PREFIX):
+            status, body = 404, {'success': False, 'error': "Not found"}
+        else:
+            try:
+                status, body = self.backend.handle(url.path[len(PREFIX):], dict(parse_qsl(url.query)))
+            except (ValueError, OSError) as e:
+                status, body = 500, {'success': False, 'error': str(e)}
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+#     room for lots of players connecting at once (the default is 5)
+    request_queue_size = 1024
+
+
+def make_server(backend, host='127.0.0.1', port=8765):
+    """ Returns an HTTP server (not started yet) that answers with 'backend'. port=0 picks a free port. """
+    handler = type('Handler', (Handler,), {'backend': backend})
+    return Server((host, port), handler)
+
+
+def start_in_background(backend, host='127.0.0.1', port=0):
+    """ Starts a server on a background thread and returns (server, API URL). """
+    server = make_server(backend, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/api/deck"
+
+
+def load_test(url, clients=100, rounds=20, cards=6):
+    """ 'clients' players at once, each playing 'rounds' rounds of 'cards' draws through the game's own
+        Deck class (reshuffling when the deck gets low). Returns the results as a dict. """
+    from . import deck_api
+    from requests.adapters import HTTPAdapter
+
+    deck_api.API_URL = url
+#     one keep-alive connection per player, so nobody waits on the pool
+    deck_api.session().mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=clients))
+    from . import game as bj
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    go = threading.Event()
+
+    def player():
+        times = []
+        try:
+            deck = bj.Deck(deck_api.get("new/shuffle/", deck_count=1)['deck_id'])
+            go.wait()
+            for _ in range(rounds):
+                if deck.remaining + len(deck.buffer) < cards:
+                    deck.close()
+                    deck.buffer.clear()
+                    bj.reshuffle_deck(deck.deck_id)
+                    deck.remaining = deck.size
+                for _ in range(cards):
+                    start = time.perf_counter()
+                    if not deck.draw(1):
+                        raise RuntimeError("draw came back empty")
+                    times.append(time.perf_counter() - start)
+            deck.close()
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+        with lock:
+            latencies.extend(times)
+
+    threads = [threading.Thread(target=player) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    go.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+    return {
+        'clients': clients,
+        'draws': len(latencies),
+        'seconds': elapsed,
+        'draws_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': pct(0.5),
+        'p99_ms': pct(0.99),
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="A local stand-in for deckofcardsapi.com.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="run the stand-in API")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--seed', type=int, help="make the shuffles repeatable")
+    serve.add_argument('--latency', type=float, default=0, help="seconds to wait before every answer")
+    serve.add_argument('--record', metavar='FILE', help="pass calls through to the real API and save them here")
+    serve.add_argument('--upstream', default=UPSTREAM, help="the real API, for --record")
+    serve.add_argument('--replay', metavar='FILE', help="answer calls from a recording")
+    load = commands.add_parser('load', help="load-test the game's deck client")
+    load.add_argument('--url', help="API to hit (default: start a stand-in right here)")
+    load.add_argument('--clients', type=int, default=100)
+    load.add_argument('--rounds', type=int, default=20)
+    load.add_argument('--cards', type=int, default=6, help="draws per round")
+    load.add_argument('--seed', type=int)
+    load.add_argument('--latency', type=float, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'load':
+        url = args.url
+        if url is None:
+            server, url = start_in_background(DeckBackend(args.seed, args.latency))
+        print(json.dumps(load_test(url, args.clients, args.rounds, args.cards), indent=2))
+        return
+
+    if args.record:
+        backend = Recorder(args.record, args.upstream)
+    elif args.replay:
+        backend = Replayer(args.replay)
+    else:
+        backend = DeckBackend(args.seed, args.latency)
+    server = make_server(backend, args.host, args.port)
+    print(f"Serving the deck API on http://{args.host}:{server.server_address[1]}{PREFIX.rstrip('/')}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,788 @@
+import threading
+import time
+import os
+from collections import deque
+
+from . import deck_api
+from . import metrics
+from . import render
+from . import shoe
+from .counting import Counter
+from .deck_pool import DeckError, DeckPool
+from .hand import Hand, card_from_api
+from .history import HistoryWriter, DEALER_BLACKJACK, DOUBLED, INSURED, PLAYER_BLACKJACK
+
+# ASCII corner and line symbols:
+# https://textkool.com/en/symbols/corner-symbols
+# https://textkool.com/en/symbols/line-symbols
+
+# ASCII card symbols:
+# https://textkool.com/en/symbols/card-symbols
+
+# I wanted to practice using APIs, so the game uses this deck of cards API:
+# https://www.deckofcardsapi.com/
+
+# Where the cards come from:
+#   "remote" = the deckofcardsapi.com API (default)
+#   "local" = an in-memory shoe (see shoe.py), no network needed
+DECK_BACKEND = os.environ.get("BLACKJACK_DECK_BACKEND", "remote")
+DECK_COUNT = int(os.environ.get("BLACKJACK_DECK_COUNT", 1))
+if not 1 <= DECK_COUNT <= 8:
+    raise ValueError("BLACKJACK_DECK_COUNT has to be 1-8")
+# the shoe is kept from round to round until this much of it (0-1) has been dealt (the cut card),
+# and only then reshuffled. 0 = a fresh shoe every round.
+PENETRATION = float(os.environ.get("BLACKJACK_PENETRATION", 0.75))
+# show the running and true count when it's time to bet
+SHOW_COUNT = os.environ.get("BLACKJACK_SHOW_COUNT", "") not in {"", "0"}
+# log every hand to this file (see history.py)
+HISTORY = os.environ.get("BLACKJACK_HISTORY")
+# seed for the local shoe, so a game can be replayed card for card
+SEED = os.environ.get("BLACKJACK_SEED")
+if SEED is not None:
+    shoe.seed_shoes(SEED)
+# remote decks draw this many cards per API call and keep them in a buffer,
+# and start fetching the next batch once the buffer is down to REFILL_AT cards
+BUFFER_SIZE = 8
+REFILL_AT = 4
+# how many shuffled decks to keep ready for the next round
+POOL_SIZE = 3
+
+# The phases of a round (see Game at the bottom).
+START = "start"
+BET = "bet"
+DEAL = "deal"
+INSURANCE = "insurance"
+INSURANCE_AMOUNT = "insurance amount"
+PEEK = "peek"
+BLACKJACK = "blackjack"
+PLAYER_TURN = "player turn"
+PLAYER_HIT = "player hit"
+DOUBLE_DOWN = "double down"
+DEALER_TURN = "dealer turn"
+DEALER_HIT = "dealer hit"
+SETTLE = "settle"
+PLAY_AGAIN = "play again"
+QUIT = "quit"
+# what to ask the player in the phases that need an answer
+PROMPTS = {
+    BET: "MY BET: $",
+    INSURANCE: "Would you like to buy insurance? (Y/N): ",
+    INSURANCE_AMOUNT: "You can insure up to ${max_insurance:.2f}. \nHow much would you like to insure? $",
+    PLAYER_TURN: "\nWhat would you like to do? (H)IT / (S)TAND / (D)OUBLE DOWN: ",
+    PLAY_AGAIN: "Would you like to play again? (Y/N): ",
+}
+
+class Deck:
+    # NOTE: I wanted to practice using APIs, so the game uses this deck of cards API
+    # !!! MARIA !!! You wrote notes down!!!
+    # where messages for the player go (None = stdout; new_deck hands it the table's)
+    out = None
+
+    def __init__(self, deck_id):
+        self.deck_id = deck_id
+        self.base_url = f"{deck_api.API_URL}/{self.deck_id}/"
+        # if this is a local deck, the cards come from here instead of the API
+        self.shoe = shoe.get_shoe(deck_id)
+        # cards already drawn from the API but not dealt yet
+        self.buffer = deque()
+        self.lock = threading.Lock()
+        self.refill_thread = None
+        self.size = 52 * DECK_COUNT
+        self.remaining = self.size
+        # how many cards have been dealt from this deck, and where the cut card is
+        self.dealt = 0
+        self.cut = int(self.size * PENETRATION)
+        # counts every card as it comes out
+        self.counter = Counter(DECK_COUNT)
+        if self.shoe is None:
+            self._refill()
+        
+
+    def _get(self, action):
+        """ Returns the requested stuff from the API. 'action' can be:
+                draw = draw a card from the deck (without replacement)
+                return = return all cards to the deck (might DELETE THIS later) """
+        if action == 'draw':
+            cards = self.draw(1)
+            if cards:
+                return {'success': True, 'deck_id': self.deck_id, 'cards': cards, 'remaining': self.remaining}
+        elif self.shoe is not None:
+            return self.shoe._get(action)
+        else:
+            res = deck_api.get(f"{self.deck_id}/{action}/")
+            if res is not None:
+                return res
+        print(f"There was an error {action}ing the card(s).", file=self.out)
+
+
+    @property
+    def needs_shuffle(self):
+        """ True once the cut card has come out (or, with no cut card, once anything has been dealt). """
+        return self.dealt > 0 and self.dealt >= self.cut
+
+
+    def reshuffle(self):
+        """ Puts every card back and shuffles, in the middle of a round if the shoe ran out. """
+        print("The shoe ran out. Reshuffling...", file=self.out)
+        self.close()
+        self.buffer.clear()
+        self._get('shuffle')
+        self.remaining = self.size
+        self.counter.reset()
+        if self.shoe is None:
+            self._refill()
+
+
+    def close(self):
+        """ Waits for any background draw to finish, so the deck can be safely reshuffled. """
+        if self.refill_thread is not None:
+            self.refill_thread.join()
+
+
+    def draw(self, count=1):
+        """ Returns a list of 'count' API cards (the things inside card['cards']).
+            Cards come out of the buffer if they're already there,
+            and the buffer is topped up in the background when it gets low. """
+        with metrics.timer('draw_seconds'):
+            self.dealt += count
+            if self.shoe is not None:
+                if self.shoe.remaining < count:
+                    self.reshuffle()
+                cards = self.shoe.draw(count)
+                self.remaining = self.shoe.remaining
+                for card in cards:
+                    self.counter.see(card)
+                return [shoe.card_dict(card) for card in cards]
+            self.ready(count)
+            if len(self.buffer) < count and self.remaining <= 0:
+                self.reshuffle()
+                self.ready(count)
+            with self.lock:
+                cards = [self.buffer.popleft() for _ in range(min(count, len(self.buffer)))]
+            if len(self.buffer) <= REFILL_AT:
+                self._refill()
+            for card in cards:
+                self.counter.see(card_from_api(card))
+            return cards
+
+
+    def ready(self, count):
+        """ Waits until at least 'count' cards are in the buffer (or the deck runs out),
+            so the next 'count' draws won't have to wait on the API. """
+        if self.shoe is not None:
+            return
+        if len(self.buffer) < count and self.refill_thread is not None:
+#             the cards we need might already be on their way
+            self.refill_thread.join()
+        if len(self.buffer) < count:
+            self._fetch(count - len(self.buffer) + BUFFER_SIZE)
+
+
+    def _fetch(self, count):
+        """ Draws 'count' cards from the API in one call and puts them in the buffer. """
+        count = min(count, self.remaining)
+        if count <= 0:
+            return
+        res = deck_api.get(f"{self.deck_id}/draw/", count=count)
+        if res is None:
+            return
+        with self.lock:
+            self.buffer.extend(res['cards'])
+            self.remaining = res['remaining']
+
+
+    def _refill(self):
+        """ Starts fetching the next batch of cards in the background (if it isn't already). """
+        if self.refill_thread is not None and self.refill_thread.is_alive():
+            return
+        if self.remaining <= 0:
+            return
+        self.refill_thread = threading.Thread(target=self._fetch, args=(BUFFER_SIZE,), daemon=True)
+        self.refill_thread.start()
+    
+
+    def evaluate_card(self, card):
+        """ Takes in an API card and returns the int value of that card.
+                2-9 will return that value.
+                JACK, QUEEN, and KING will return 10.
+                ACE will return 11. """
+        card_id = card['cards'][0]['value']
+        if card_id.lower() in {'jack','queen','king'}:
+            card_val = 10
+        elif card_id.lower() == 'ace':
+            card_val = 11
+        elif int(card_id) <= 10:
+            card_val = int(card_id)
+#         print(f"Card: {card_id} has value {card_val}.")
+        return card_val
+    
+    def card_suit(self, card):
+        """ Takes in an API card and returns the suit icon of that card. """
+        card_suit = card['cards'][0]['suit'].lower()
+        if card_suit == "clubs":
+            return '♣'
+        
+        elif card_suit == "diamonds":
+            return '♦'
+        
+        elif card_suit == "spades":
+            return '♠'
+        
+        elif card_suit == "hearts":
+            return '♥'
+
+
+
+class Player:
+    has_blackjack = False
+    insurance = 0
+    # where everything the player is told goes (None = stdout; Game sets it)
+    out = None
+    
+    def __init__(self, deck, money, bet):
+        self.deck = deck
+        self.money = money
+        self.original_money = money
+        self.bet = bet
+        self.has_blackjack = False
+#         reset the class attributes
+        self.hand = Hand()
+#         show the count when betting (see counting.py)
+        self.counting = SHOW_COUNT
+
+    @property
+    def hand_val(self):
+        """ The value of the hand (each ace already counted as 1 or 11). """
+        return self.hand.total
+
+    def hand_lines(self, insurance):
+        """ Returns the player's part of the table as lines, 
+            including if they have a blackjack, 
+            their current bet,
+            and their current wallet total. """
+        lines = ["", "----- MY HAND -----"]
+        lines += render.hand_rows(self.hand)
+        if self.has_blackjack:
+            lines.append("\tBLACKJACK!")
+        lines.append(f"MY BET: ${self.bet:.2f}")
+        if insurance:
+            lines.append(f"INSURANCE: ${self.insurance:.2f}")
+        lines.append(f"MY WALLET: ${self.money:.2f}")
+        return lines
+
+    
+    def place_bet(self, amt):
+        """ Takes the amount typed in at the MY BET prompt.
+                if it's a valid bet, sets self.bet and moves on to the deal
+                if not, says why and asks again """
+        if amt.isdigit():
+            if amt == '' or int(amt) < 5:
+                print("TOO LOW. Minimum bet is $5.", file=self.out)
+            elif int(amt) > self.money:
+                print(f"TOO HIGH. You only have ${self.money} in your wallet.", file=self.out)
+            else:
+                self.bet = int(amt)
+                return DEAL
+        else:
+            print("Please enter a whole number.", file=self.out)
+        return BET
+
+    
+    def take_turn(self, dealer, choice):
+        """ Takes the player's choice to hit, stand or double down.
+                if hit, next is self.hit()
+                if stand, next is dealer.take_turn()
+                if double down, doubles the bet and next is self.hit(doubledown=True) """
+        choice = choice.lower().strip()
+        if choice not in {'hit', 'stand','double down','h','s','d'}:
+            print("That didn't work.", file=self.out)
+            return PLAYER_TURN
+        if (choice == 'd' or choice == 'double down') and self.bet * 2 > self.money:
+            print(f"You don't have enough money to double down. You only have ${self.money:.2f}", file=self.out)
+            return PLAYER_TURN
+        if choice == 'hit' or choice == 'h':
+            return PLAYER_HIT
+        elif choice == 'stand' or choice == 's':
+            return DEALER_TURN
+        elif choice == 'double down' or choice == 'd':
+            self.bet *= 2
+            return DOUBLE_DOWN
+#         (splitting a pair is in table.py: `play --seats 1` is this game with splits)
+    
+    def hit(self, dealer, doubledown=False):
+        """ Draws a new API card and puts it in the player's hand.
+            Evaluates the player's hand's value after the draw to see if they lost """
+#         print("You have decided to HIT.")
+        card = self.deck._get('draw')
+#         the hand counts its own aces as 1 or 11 as cards come in
+        self.hand.add(card_from_api(card))
+        dealer.show(False, insurance=False)
+        if self.hand.bust:
+            print("===============", file=self.out)
+            print("Your total is over 21. You lost.", file=self.out)
+            self.money -= self.bet
+            print(f"WALLET: ${self.money:.2f}", file=self.out)
+            return PLAY_AGAIN
+        elif doubledown:
+            return DEALER_TURN
+        else:
+            return PLAYER_TURN
+
+    
+    def quit(self):
+        """ Prints out the player's money information and quits game. """
+        print("\n=============== THANKS FOR PLAYING ===============", file=self.out)
+        print(f"STARTING WALLET: ${self.original_money:.2f}.", file=self.out)
+        print(f"CURRENT WALLET: ${self.money:.2f}", file=self.out)
+        if self.money < self.original_money:
+            print(f"You lost ${self.original_money-self.money:.2f}.", file=self.out)
+        elif self.money >= self.original_money:
+            print(f"You gained ${self.money-self.original_money:.2f}.", file=self.out)
+        print("\nPlay again! I'm sure you'll win big!", file=self.out)
+        path = metrics.write()
+        if path is not None:
+            print(f"(Metrics saved to {path}.)")
+        
+    
+    def play_again(self, dealer, again):
+        """ Takes the answer to "play again?".
+                if yes, resets the player's betting information and hand, and starts a new round.
+                if no, quit. """
+        again = again.lower()
+        if again not in {"y",'n'}:
+            print("That didn't work.", file=self.out)
+            return PLAY_AGAIN
+        elif again == 'y':
+            # reset all class attributes
+            self.bet = 0
+            self.hand = Hand()
+            self.has_blackjack = False
+            self.insurance = 0
+            dealer.hand = Hand()
+            dealer.has_blackjack = False
+            dealer.opt_insurance = False
+            return START
+        elif again == 'n':
+            self.quit()
+            return QUIT
+
+
+
+class Dealer():
+    
+    has_blackjack = False
+    opt_insurance = False
+    # where the table gets drawn (the server gives every table its own)
+    screen = render.screen
+    # where everything else the dealer says goes (None = stdout; Game sets it)
+    out = None
+    
+    def __init__(self, deck, player):
+        self.deck = deck
+        self.player = player
+#         reset the class attributes
+        self.hand = Hand()
+        self.has_blackjack = False
+    
+    
+    @property
+    def hand_val(self):
+        """ The value of the hand (each ace already counted as 1 or 11). """
+        return self.hand.total
+
+
+    def hand_lines(self, dealer_turn):
+        """ Returns the dealer's part of the table as lines.
+            Until it's the dealer's turn, the second card stays face down. """
+        lines = ["--- DEALER HAND ---"]
+        if dealer_turn:
+            lines += render.hand_rows(self.hand)
+            if self.has_blackjack:
+                lines.append("\tBLACKJACK!")
+        else:
+            lines += render.hand_rows(self.hand.cards[:2], face_down=1 if len(self.hand) == 2 else 0)
+        return lines
+
+
+    def show(self, dealer_turn, insurance):
+        """ Draws the whole table (dealer's hand, then mine) in one go. """
+        self.screen.draw(self.hand_lines(dealer_turn) + self.player.hand_lines(insurance))
+            
+    
+    def deal(self):
+        """ Simulates dealing the cards, one card per call:
+                1. to me, 2. to the dealer (face up), 3. to me, 4. to the dealer (face down)
+            Returns DEAL until all four cards are out. """
+        dealt = len(self.hand) + len(self.player.hand)
+        if dealt == 0:
+#         1. To me
+            card = self.deck._get('draw')
+            self.player.hand.add(card_from_api(card))
+            self.show(False, insurance=False)
+            return DEAL
+
+        elif dealt == 1:
+#         2. To Dealer (face up)
+            card = self.deck._get('draw')
+            self.hand.add(card_from_api(card))
+            # BOOKMARK - uncomment the line below to force an insurance query
+            # self.opt_insurance = True
+            if self.hand_val == 11:
+                self.opt_insurance = True
+            self.show(False, insurance=False) # for the ambiance, showing my hand below the dealer's
+            return DEAL
+
+        elif dealt == 2:
+#         3. To me
+            card = self.deck._get('draw')
+            self.player.hand.add(card_from_api(card))
+#         If it's a blackjack, let me know. 
+            if self.player.hand.blackjack:
+                self.player.has_blackjack = True
+            self.show(False, insurance=False)
+#         print(f"HAND VALUE: {self.player.hand_val}")
+            return DEAL
+
+#         4. To Dealer (face down)
+        card = self.deck._get('draw')
+        self.hand.add(card_from_api(card))
+        if self.hand.blackjack:
+            self.has_blackjack = True
+        self.show(False, insurance=False)
+#         AFTER DEALER'S TURN: add the value of the current hand to dealer's hand
+#         If the dealer shows an ace, offer insurance and check for a dealer Blackjack first.
+#         If you have a blackjack, you win (see pay_blackjack).
+#         If you don't have blackjack, take your turn.
+        if self.opt_insurance:
+            return INSURANCE
+        return BLACKJACK
+
+
+    def take_insurance(self, opt_in):
+        """ Takes the answer to "buy insurance?".
+            If yes, next is asking how much (insure). """
+        opt_in = opt_in.lower()
+        if opt_in not in {'y','n'}:
+            print("That didn't work.", file=self.out)
+            return INSURANCE
+        return INSURANCE_AMOUNT if opt_in == 'y' else PEEK
+
+
+    def insure(self, amt):
+        """ Takes the amount of insurance the player wants (up to half their bet). """
+        try:
+            amt = float(amt)
+        except ValueError:
+            print("That didn't work. Please enter a number.", file=self.out)
+            return INSURANCE_AMOUNT
+        if amt > self.player.bet / 2:
+            print(f"That didn't work. You can only insure up to ${self.player.bet/2:.2f}.", file=self.out)
+            return INSURANCE_AMOUNT
+        print(f"INSURANCE: ${amt:.2f}", file=self.out)
+        self.player.insurance = amt
+        return PEEK
+
+
+    def peek(self):
+        """ With an ace showing, the dealer checks for a Blackjack before anyone plays.
+                if the dealer has one, insurance pays 2:1 and the round is over
+                if not, insurance is lost and play continues as usual """
+        ins = self.player.insurance > 0
+        if self.has_blackjack:
+            self.show(True, ins)
+            print("Dealer has a Blackjack!", file=self.out)
+            if ins:
+                self.player.money += (self.player.insurance*2)
+            print("===============", file=self.out)
+            if self.player.has_blackjack:
+                print("TIE!", file=self.out)
+            else:
+                print("You lose.", file=self.out)
+                self.player.money -= self.player.bet
+            print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+            return PLAY_AGAIN
+
+        if ins:
+            self.player.money -= self.player.insurance
+        self.show(False, insurance=False)
+        print("Dealer does not have a Blackjack.", file=self.out)
+        # play continues as usual.
+        return BLACKJACK
+
+
+    def pay_blackjack(self):
+        """ A player Blackjack wins 1.5x right away. Otherwise it's the player's turn. """
+        if self.player.has_blackjack:
+                print("===============", file=self.out)
+                print("You win!", file=self.out)
+                self.player.money += (self.player.bet*1.5)
+                print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+                return PLAY_AGAIN
+        return PLAYER_TURN
+
+        
+    def take_turn(self, insurance):
+        """ Dealer decides how to take turn """
+        self.show(True, insurance)
+        if self.player.has_blackjack:
+            if self.has_blackjack:
+                print("===============", file=self.out)
+                print("You both have a Blackjack. TIE!", file=self.out)
+                print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+                return PLAY_AGAIN
+            else:
+                print("===============", file=self.out)
+                print("You win!", file=self.out)
+                self.player.money += (self.player.bet*1.5)
+                print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+                return PLAY_AGAIN
+        else:
+            if self.hand.bust:
+                print("===============", file=self.out)
+                print("Dealer total is over 21. You win!", file=self.out)
+                self.player.money += self.player.bet
+                print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+                return PLAY_AGAIN
+            elif self.hand_val < 17:
+                return DEALER_HIT
+            elif self.hand_val >= 17 and self.hand_val <= 21:
+                return SETTLE
+        
+    
+    def hit(self):
+#         print("Dealer has chosen to HIT.")
+        card = self.deck._get("draw")
+        self.hand.add(card_from_api(card))
+        self.show(True, insurance=False)
+        return DEALER_TURN
+    
+
+    def compare_hands(self, insurance):
+        print("===============", file=self.out)
+        if self.hand_val > self.player.hand_val:
+            print("Dealer's hand is higher. You lose.", file=self.out)
+            self.player.money -= self.player.bet
+            print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+        elif self.hand_val < self.player.hand_val:
+            print("Your hand is higher. You win!", file=self.out)
+            self.player.money += self.player.bet
+            print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+        elif self.hand_val == self.player.hand_val:
+            if self.has_blackjack and self.player.has_blackjack:
+                print("You both have a Blackjack. TIE!", file=self.out)
+                print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+            elif self.has_blackjack:
+                print("Dealer has Blackjack. You lose.", file=self.out)
+                if insurance:
+                    print("Subtracting Insurance.", file=self.out)
+                    self.player.money -= self.player.insurance
+                else:
+                    self.player.money -= self.player.bet
+                print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+            else:
+                print("TIE!", file=self.out)
+                print(f"WALLET: ${self.player.money:.2f}", file=self.out)
+        return PLAY_AGAIN
+
+
+
+def get_new_deck_id():
+    if DECK_BACKEND == "local":
+        return shoe.new_deck(DECK_COUNT)["deck_id"]
+    with metrics.timer('new_deck_seconds'):
+        deck = deck_api.get("new/shuffle/", deck_count=DECK_COUNT)
+    if deck is None:
+        print("Error making new deck.")
+        return None
+    return deck["deck_id"]
+
+def reshuffle_deck(deck_id):
+    """ Puts all the cards back in a used deck and shuffles it, so it can be used again. """
+    local = shoe.get_shoe(deck_id)
+    if local is not None:
+        local.shuffle()
+        return deck_id
+    if deck_api.get(f"{deck_id}/shuffle/") is None:
+        print("Error shuffling deck.")
+        return None
+    return deck_id
+
+# started the first time a deck is needed, so importing the game doesn't go making decks
+deck_pool = None
+_pool_lock = threading.Lock()
+
+def get_deck_pool():
+    """ The shuffled decks every table shares (see deck_pool.py). """
+    global deck_pool
+    with _pool_lock:
+        if deck_pool is None:
+            deck_pool = DeckPool(get_new_deck_id, reshuffle_deck, POOL_SIZE)
+        return deck_pool
+    
+def next_deck(deck):
+    """ Gives a used deck (if there is one) back to the pool and returns a freshly shuffled one. """
+    pool = get_deck_pool()
+    if deck is not None:
+        deck.close()
+        pool.release(deck.deck_id)
+    with metrics.timer('deck_wait_seconds'):
+        return Deck(pool.acquire())
+
+def new_deck(dealer, player):
+    """ Gives the used deck back to the pool and takes a fresh one for the next round. """
+    deck = next_deck(player.deck)
+    deck.out = dealer.out
+    player.deck = deck
+    dealer.deck = deck
+
+def needs_new_deck(player):
+    return player.deck is None or player.deck.needs_shuffle
+
+def start(dealer, player):
+    """ Starts a new round: gets a freshly shuffled shoe once the cut card is out, and asks for bets. """
+    dealer.screen.clear()
+    if needs_new_deck(player):
+        new_deck(dealer, player)
+    print("=============== WELCOME TO BLACKJACK ===============", file=dealer.out)
+    print("PLACE YOUR BETS. Minimum: $5.", file=dealer.out)
+    print("-----", file=dealer.out)
+    if player.counting:
+        counter = player.deck.counter
+        print(f"RUNNING COUNT: {counter.running:+d}   TRUE COUNT: {counter.true_count:+.1f}", file=dealer.out)
+    print(f"WALLET: ${player.money:.2f}.", file=dealer.out)
+    return BET
+
+
+class Game:
+    """ Runs the game one phase at a time. Every method above does its part of the round
+        and returns the name of the next phase instead of calling it, so the stack
+        stays flat no matter how many rounds get played.
+        To drive it, loop until game.over:
+            if game.prompt is None, call game.step()
+            otherwise get an answer to game.prompt and call game.step(answer)
+        and wait game.pause seconds in between (that's the card-by-card pacing;
+        pace=0 turns it off for anything that isn't a person watching).
+        If 'history' (a HistoryWriter) is given, every settled hand gets logged to it.
+        Everything the game prints goes to 'out' (a terminal.Terminal, the dealer's screen's by default). """
+
+    def __init__(self, dealer, player, pace=1, history=None, out=None):
+        self.dealer = dealer
+        self.player = player
+        self.out = dealer.out = player.out = out or dealer.screen.term
+        self.pace = pace
+        self.history = history
+        # the wallet when the bet went down, and the moves made since
+        self.round_money = player.money
+        self.decisions = []
+        self.pause = 0
+        self.phase = START
+        self.phases = {
+            START: lambda: start(dealer, player),
+            BET: player.place_bet,
+            DEAL: dealer.deal,
+            INSURANCE: dealer.take_insurance,
+            INSURANCE_AMOUNT: dealer.insure,
+            PEEK: dealer.peek,
+            BLACKJACK: dealer.pay_blackjack,
+            PLAYER_TURN: lambda choice: player.take_turn(dealer, choice),
+            PLAYER_HIT: lambda: player.hit(dealer),
+            DOUBLE_DOWN: lambda: player.hit(dealer, doubledown=True),
+            DEALER_TURN: lambda: dealer.take_turn(insurance=False),
+            DEALER_HIT: dealer.hit,
+            SETTLE: lambda: dealer.compare_hands(insurance=False),
+            PLAY_AGAIN: lambda again: player.play_again(dealer, again),
+        }
+
+    @property
+    def over(self):
+        return self.phase == QUIT
+
+    @property
+    def prompt(self):
+        """ What to ask the player, or None if the next step doesn't need an answer. """
+        if self.phase in PROMPTS:
+            return PROMPTS[self.phase].format(max_insurance=self.player.bet / 2)
+
+    def step(self, answer=None):
+        """ Runs the current phase and moves on to the next one. """
+        phase = self.phase
+        with metrics.timer('phase_seconds', phase=phase):
+            if phase in PROMPTS:
+                self.phase = self.phases[phase](answer)
+            else:
+                self.phase = self.phases[phase]()
+#         a second between cards, and before each dealer move
+        self.pause = self.pace if phase == DEAL or self.phase in {DEALER_HIT, SETTLE} else 0
+        if self.history is not None:
+            self.log(phase, self.phase)
+        return self.phase
+
+    def log(self, phase, next_phase):
+        """ Keeps track of the round, and writes it to the history once it's settled. """
+        player = self.player
+        dealer = self.dealer
+        if phase == BET and next_phase == DEAL:
+            self.round_money = player.money
+            self.decisions = []
+        elif phase == PLAYER_TURN and next_phase != PLAYER_TURN:
+            self.decisions.append({PLAYER_HIT: 'h', DEALER_TURN: 's', DOUBLE_DOWN: 'd'}[next_phase])
+        elif next_phase == PLAY_AGAIN and phase != PLAY_AGAIN:
+            net = player.money - self.round_money
+#             insurance is settled on its own (see peek), so take it out to see how the hand itself went
+            insured = 0
+            if player.insurance > 0:
+                insured = player.insurance * 2 if dealer.has_blackjack else -player.insurance
+            hand_net = net - insured
+            flags = ((PLAYER_BLACKJACK if player.has_blackjack else 0)
+                     | (DEALER_BLACKJACK if dealer.has_blackjack else 0)
+                     | (INSURED if player.insurance > 0 else 0)
+                     | (DOUBLED if 'd' in self.decisions else 0))
+            self.history.add(player.bet, player.insurance, net, ''.join(self.decisions),
+                             (hand_net > 0) - (hand_net < 0), flags, player.hand.cards, dealer.hand.cards)
+
+
+def play(game):
+    """ Plays the game in this terminal until the player quits. """
+    while not game.over:
+        if game.pause:
+            with metrics.timer('pace_seconds'):
+                time.sleep(game.pause)
+        if game.prompt is None:
+            game.step()
+        else:
+            with metrics.timer('input_wait_seconds', phase=game.phase):
+                answer = game.out.input(game.prompt)
+            game.step(answer)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Play Blackjack in this terminal.")
+    parser.add_argument('--money', type=float, default=100, help="starting wallet")
+    parser.add_argument('--pace', type=float, default=1, help="seconds between cards")
+    parser.add_argument('--history', metavar='FILE', default=HISTORY, help="log every hand to this file")
+    parser.add_argument('--seats', type=int, help="play at a table with this many seats (1-7, taking turns), with splits")
+    args = parser.parse_args(argv)
+    if args.seats is not None:
+        from .table import MAX_SEATS, TableGame
+        if not 1 <= args.seats <= MAX_SEATS:
+            parser.error(f"--seats has to be 1-{MAX_SEATS}")
+    history = HistoryWriter(args.history) if args.history else None
+    try:
+        if args.seats is not None:
+            game = TableGame(args.seats, args.money, pace=args.pace, history=history)
+        else:
+            me = Player(None, args.money, 0)
+            dealer = Dealer(None, me)
+            game = Game(dealer, me, pace=args.pace, history=history)
+        play(game)
+    except DeckError as e:
+        print(f"\n{e} Try again later, or play offline with BLACKJACK_DECK_BACKEND=local.")
+        return 1
+    finally:
+        if history is not None:
+            history.close()
+
+
+if __name__ == "__main__":
+    main()
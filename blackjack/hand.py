@@ -0,0 +1,71 @@
+from .shoe import card_code
+
+# Compact cards and hands.
+# A card is an int 0-51 (suit * 13 + rank, same as shoe.py), and a Hand keeps
+# its total and soft aces up to date as each card comes in, so nothing
+# ever has to look back through the hand to work out what the aces are worth.
+
+# card values by rank (ACE, 2-10, JACK, QUEEN, KING); aces start out as 11
+VALUES = (11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10)
+
+# API card code ('AS', '0H', ...) -> int card
+CARDS_BY_CODE = {card_code(card): card for card in range(52)}
+
+
+def card_from_api(card):
+    """ Takes in an API card (a draw response or one of its 'cards') and returns the int card. """
+    if 'cards' in card:
+        card = card['cards'][0]
+    return CARDS_BY_CODE[card['code']]
+
+
+def card_value(card):
+    """ Takes in an int card and returns its value (ACE is 11). """
+    return VALUES[card % 13]
+
+
+class Hand:
+    """ The cards in one hand, plus its running total.
+            total = best value of the hand (aces count 11 until that would go over 21)
+            soft_aces = how many aces are still being counted as 11 """
+    __slots__ = ('cards', 'total', 'soft_aces')
+
+    def __init__(self, cards=()):
+        self.cards = bytearray()
+        self.total = 0
+        self.soft_aces = 0
+        for card in cards:
+            self.add(card)
+
+    def add(self, card):
+        """ Puts an int card in the hand and updates the total. """
+        self.cards.append(card)
+        value = VALUES[card % 13]
+        self.total += value
+        if value == 11:
+            self.soft_aces += 1
+        while self.total > 21 and self.soft_aces:
+#             count aces as 1 instead of 11 until the hand is back under 22 (only ever once per ace)
+            self.total -= 10
+            self.soft_aces -= 1
+
+    @property
+    def soft(self):
+        return self.soft_aces > 0
+
+    @property
+    def blackjack(self):
+        return self.total == 21 and len(self.cards) == 2
+
+    @property
+    def bust(self):
+        return self.total > 21
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def __repr__(self):
+        return f"Hand([{', '.join(card_code(card) for card in self.cards)}], total={self.total})"
@@ -0,0 +1,237 @@
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+# A log of every hand played, so results outlive the process.
+# Each settled hand is one fixed-size record appended to a binary file:
+#
+#   time       d    when the hand was settled (unix seconds)
+#   bet        i    in cents (after any double down)
+#   insurance  i    in cents
+#   net        i    what the wallet went up (or down) by, in cents, insurance included
+#   decisions  I    the player's moves, 2 bits each, first move in the lowest bits (see DECISIONS)
+#   outcome    b    1 win, 0 push, -1 loss (of the hand itself, not counting insurance)
+#   flags      B    see PLAYER_BLACKJACK etc.
+#   player/dealer card counts, then their first 10 cards each (int cards, see shoe.py)
+#
+# Records are packed into a buffer and written out in batches on a background thread,
+# so the table never waits on the disk. Since every record is the same size, the reader can map
+# the whole file and hand back each field as a NumPy column without copying or parsing anything.
+
+MAGIC = b'BJHL'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+RECORD = struct.Struct('<diiiIbBBB10s10s')
+MAX_CARDS = 10
+
+# decision codes (0 = no more decisions)
+DECISIONS = {'h': 1, 's': 2, 'd': 3}
+DECISION_NAMES = {code: name for name, code in DECISIONS.items()}
+
+# flags
+PLAYER_BLACKJACK = 1
+DEALER_BLACKJACK = 2
+INSURED = 4
+DOUBLED = 8
+# the hand is one of two or more a pair was split into (see table.py)
+SPLIT = 16
+
+FIELDS = ('time', 'bet', 'insurance', 'net', 'decisions', 'outcome', 'flags',
+          'player_count', 'dealer_count', 'player_cards', 'dealer_cards')
+
+
+def pack_decisions(decisions):
+    """ Takes a string of moves ('hhs') and returns them packed into an int (up to 16 moves). """
+    packed = 0
+    for i, move in enumerate(decisions[:16]):
+        packed |= DECISIONS[move] << (2 * i)
+    return packed
+
+
+def unpack_decisions(packed):
+    moves = []
+    while packed:
+        moves.append(DECISION_NAMES[packed & 3])
+        packed >>= 2
+    return ''.join(moves)
+
+
+class HistoryWriter:
+    """ Appends hands to a log file.
+            batch = records to collect before handing them to the writer thread
+            flush_every = seconds after which a partial batch is written anyway """
+
+    def __init__(self, path, batch=256, flush_every=1.0):
+        self.path = path
+        self.batch = batch
+        self.flush_every = flush_every
+        self.buffer = bytearray()
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.file = self._open(path)
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def _open(path):
+        f = open(path, 'ab+')
+        f.seek(0)
+        header = f.read(HEADER.size)
+        if not header:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            f.flush()
+            return f
+        magic, version, size = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or size != RECORD.size:
+            f.close()
+            raise ValueError(f"{path} isn't a version {VERSION} hand history")
+#         drop a half-written record at the end (the program died mid-write)
+        end = os.fstat(f.fileno()).st_size
+        whole = HEADER.size + (end - HEADER.size) // RECORD.size * RECORD.size
+        if whole != end:
+            f.truncate(whole)
+        return f
+
+    def add(self, bet, insurance, net, decisions, outcome, flags, player_cards, dealer_cards, when=None):
+        """ Logs one hand. Money is in dollars, decisions is a string of moves ('hhs'),
+            cards are int cards. """
+        record = RECORD.pack(time.time() if when is None else when,
+                             round(bet * 100), round(insurance * 100), round(net * 100),
+                             pack_decisions(decisions), outcome, flags,
+                             min(len(player_cards), 255), min(len(dealer_cards), 255),
+                             bytes(player_cards[:MAX_CARDS]), bytes(dealer_cards[:MAX_CARDS]))
+        with self.lock:
+            self.buffer += record
+            self.pending += 1
+            if self.pending >= self.batch or time.monotonic() - self.last_flush >= self.flush_every:
+                self._hand_off()
+
+    def _hand_off(self):
+        if self.buffer:
+            self.jobs.put(bytes(self.buffer))
+            self.buffer.clear()
+            self.pending = 0
+        self.last_flush = time.monotonic()
+
+    def _work(self):
+        while True:
+            try:
+                data = self.jobs.get(timeout=self.flush_every)
+            except queue.Empty:
+#                 nothing came in for a while, so write out the partial batch too
+                with self.lock:
+                    data = bytes(self.buffer)
+                    self.buffer.clear()
+                    self.pending = 0
+                    self.last_flush = time.monotonic()
+                if not data:
+                    continue
+            if data is None:
+                break
+            self.file.write(data)
+            self.file.flush()
+
+    def flush(self):
+        """ Sends whatever is buffered to the writer thread. """
+        with self.lock:
+            self._hand_off()
+
+    def close(self):
+        """ Writes everything out and closes the file. """
+        self.flush()
+        self.jobs.put(None)
+        self.thread.join()
+        self.file.close()
+
+
+def read_records(path):
+    """ Yields every hand in a log as a dict (no NumPy needed, but slow for big logs). """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if HEADER.unpack_from(data)[0] != MAGIC:
+        raise ValueError(f"{path} isn't a hand history")
+    end = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    for values in RECORD.iter_unpack(data[HEADER.size:end]):
+        record = dict(zip(FIELDS, values))
+        record['player_cards'] = list(record['player_cards'][:record['player_count']])
+        record['dealer_cards'] = list(record['dealer_cards'][:record['dealer_count']])
+        record['decisions'] = unpack_decisions(record['decisions'])
+        yield record
+
+
+class HistoryReader:
+    """ Maps a log into memory and gives back its fields as NumPy columns (views of the file,
+        nothing is copied or read until it's used), for stats over any number of hands. """
+
+    def __init__(self, path):
+        import numpy as np
+        self.np = np
+        self.dtype = np.dtype([
+            ('time', '<f8'), ('bet', '<i4'), ('insurance', '<i4'), ('net', '<i4'), ('decisions', '<u4'),
+            ('outcome', 'i1'), ('flags', 'u1'), ('player_count', 'u1'), ('dealer_count', 'u1'),
+            ('player_cards', 'u1', (MAX_CARDS,)), ('dealer_cards', 'u1', (MAX_CARDS,)),
+        ])
+        assert self.dtype.itemsize == RECORD.size
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path} isn't a hand history")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{path} isn't a version {VERSION} hand history")
+        count = (size - HEADER.size) // RECORD.size
+        self.records = np.frombuffer(self.map, dtype=self.dtype, count=count, offset=HEADER.size)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, field):
+        """ One column, e.g. reader['net'] (money columns are in cents). """
+        return self.records[field]
+
+    def summary(self):
+        """ Totals over every hand: counts, win/push/loss rates, and net (in dollars). """
+        np = self.np
+        hands = len(self.records)
+        outcome = self.records['outcome']
+        flags = self.records['flags']
+        net = int(self.records['net'].sum(dtype=np.int64)) / 100
+        wins = int(np.count_nonzero(outcome > 0))
+        pushes = int(np.count_nonzero(outcome == 0))
+        return {
+            'hands': hands,
+            'wins': wins,
+            'pushes': pushes,
+            'losses': hands - wins - pushes,
+            'win_rate': wins / hands if hands else 0.0,
+            'push_rate': pushes / hands if hands else 0.0,
+            'blackjack_rate': int(np.count_nonzero(flags & PLAYER_BLACKJACK)) / hands if hands else 0.0,
+            'net': net,
+            'net_per_hand': net / hands if hands else 0.0,
+            'wagered': int(self.records['bet'].sum(dtype=np.int64)) / 100,
+        }
+
+    def net_by_bet(self):
+        """ Returns {bet in dollars: (hands, net in dollars)}, grouped by the final bet. """
+        np = self.np
+        bets, groups = np.unique(self.records['bet'], return_inverse=True)
+        hands = np.bincount(groups, minlength=len(bets))
+        net = np.bincount(groups, weights=self.records['net'], minlength=len(bets))
+        return {bet / 100: (int(count), total / 100) for bet, count, total in zip(bets.tolist(), hands.tolist(), net.tolist())}
+
+    def close(self):
+        self.records = None
+        self.map.close()
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    reader = HistoryReader(sys.argv[1])
+    print(json.dumps({'summary': reader.summary(), 'net_by_bet': reader.net_by_bet()}, indent=2))
@@ -0,0 +1,310 @@
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+from . import simulation
+from .parallel import split, stream_seed
+from .simulation import Simulator, Stats
+
+# Long simulation runs that can be stopped and picked up again.
+#
+# A job plays hands under one set of rules (see simulation.py) on a few independent RNG streams,
+# a chunk of hands per stream at a time. Every --every seconds, and when it's stopped (Ctrl-C or SIGTERM),
+# it writes a checkpoint: the rules, each stream's RNG state, shoe order and position, and the totals so far.
+# Running it again with the same checkpoint carries on from exactly there, so a job that got killed
+# and resumed ends up with the same numbers, hand for hand, as one that ran straight through
+# (a crash only loses the work since the last checkpoint).
+#
+# After every chunk it reports the EV so far with a confidence interval around it, and with --target
+# it stops by itself once the interval is that narrow, so no hands get played past that point.
+#
+#   python -m blackjack job run study.json --decks 6 --penetration 0.75 --target 0.0005
+#   python -m blackjack job status study.json
+#
+# How many streams there are and how big a chunk is are part of the job (they decide which hands get
+# played), but how many processes play them isn't: --workers can change from one run to the next.
+
+VERSION = 1
+# the rules a new job gets unless it's told otherwise
+RULES = {'policy': 'basic', 'deck_count': 1, 'penetration': 0.0}
+POLICIES = ('basic', 'dealer', 'exact')
+
+def _policy(name, deck_count):
+    if name != 'exact':
+        return simulation.POLICIES[name]
+#     tables.load maps each file once per process
+    from . import tables
+    return tables.load(deck_count)
+
+
+def _check_rules(rules):
+    """ Raises ValueError unless 'rules' is a full set of rules a Simulator can play by. """
+    if set(rules) != set(RULES) or rules['policy'] not in POLICIES:
+        raise ValueError(f"Unknown rules: {rules}")
+    deck_count = rules['deck_count']
+    if not isinstance(deck_count, int) or not 1 <= deck_count <= 8:
+        raise ValueError(f"deck_count has to be 1-8, not {deck_count!r}")
+    penetration = rules['penetration']
+    if not isinstance(penetration, (int, float)) or not 0 <= penetration <= 1:
+        raise ValueError(f"penetration has to be 0-1, not {penetration!r}")
+
+
+def _state(sim):
+    """ Everything about a Simulator that changes as it plays, in a form JSON can hold. """
+    return {'rng': sim.rng.getstate(), 'cards': sim.cards, 'pos': sim.pos}
+
+
+def _play(rules, state, hands):
+    """ Plays 'hands' hands on one stream. Returns the stream's new state and the Stats. """
+    sim = Simulator(policy=_policy(rules['policy'], rules['deck_count']),
+                    deck_count=rules['deck_count'], penetration=rules['penetration'])
+    version, internal, gauss = state['rng']
+    sim.rng.setstate((version, tuple(internal), gauss))
+    sim.cards = list(state['cards'])
+    sim.pos = state['pos']
+    stats = sim.run(hands)
+    return _state(sim), stats
+
+
+def _ignore_interrupts():
+#     Ctrl-C goes to the whole process group; let the main process decide when to stop
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class Job:
+    """ A simulation run that checkpoints itself to 'path'. If the file is there, the job picks up
+        from it (and anything else passed in has to match what it was started with).
+            seed, streams = where the RNG streams come from (new jobs default to 0 and 4)
+            chunk = hands each stream plays between progress reports (default 50,000)
+            rules = policy ('basic', 'dealer' or 'exact'), deck_count, penetration """
+
+    def __init__(self, path, seed=None, streams=None, chunk=None, **rules):
+        self.path = path
+        self.stopping = False
+        asked = {'seed': seed, 'streams': streams, 'chunk': chunk}
+        asked.update(rules)
+        if os.path.exists(path):
+            self._load()
+            saved = {'seed': self.seed, 'streams': len(self.states), 'chunk': self.chunk}
+            saved.update(self.rules)
+            for name, value in asked.items():
+                if value is not None and value != saved.get(name):
+                    raise ValueError(f"{path} was started with {name}={saved.get(name)!r}, not {value!r}.")
+            return
+        self.rules = dict(RULES)
+        self.rules.update((name, value) for name, value in rules.items() if value is not None)
+        _check_rules(self.rules)
+        self.seed = 0 if seed is None else seed
+        self.chunk = chunk or 50_000
+        self.states = [_state(Simulator(seed=stream_seed(self.seed, i), deck_count=self.rules['deck_count']))
+                       for i in range(streams or 4)]
+        self.stats = Stats()
+        self.elapsed = 0.0
+        self.done = None
+
+    def _load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get('version') != VERSION:
+            raise ValueError(f"{self.path} isn't a version {VERSION} job checkpoint")
+        self.rules = data['rules']
+        try:
+            _check_rules(self.rules)
+        except ValueError as e:
+            raise ValueError(f"{self.path}: {e}") from None
+        self.seed = data['seed']
+        self.chunk = data['chunk']
+        self.states = data['streams']
+        if any(len(state['cards']) != 52 * self.rules['deck_count'] for state in self.states):
+            raise ValueError(f"{self.path}: the saved shoes don't hold {self.rules['deck_count']} deck(s)")
+        self.stats = Stats()
+        for name, value in data['stats'].items():
+            setattr(self.stats, name, value)
+        self.elapsed = data['elapsed']
+        self.done = data['done']
+
+    def save(self):
+        """ Writes the checkpoint. It goes to a temp file first, so dying halfway through a save
+            still leaves the last good checkpoint in place. """
+        data = {
+            'version': VERSION,
+            'rules': self.rules,
+            'seed': self.seed,
+            'chunk': self.chunk,
+            'stats': {name: getattr(self.stats, name) for name in Stats.__slots__},
+            'elapsed': self.elapsed,
+            'done': self.done,
+            'streams': self.states,
+        }
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def interval(self, confidence=0.95):
+        """ Returns (EV per hand in bets, half-width of its 'confidence' confidence interval). """
+        stats = self.stats
+        if stats.hands < 2:
+            return stats.ev, math.inf
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        return stats.ev, z * math.sqrt(stats.variance / stats.hands)
+
+    def progress(self, confidence=0.95):
+        """ Where the job is at, as a dict. """
+        ev, half = self.interval(confidence)
+        return {
+            'hands': self.stats.hands,
+            'ev': ev,
+            'ci_low': ev - half,
+            'ci_high': ev + half,
+            'half_width': half,
+            'confidence': confidence,
+            'elapsed': round(self.elapsed, 3),
+            'hands_per_second': self.stats.hands / self.elapsed if self.elapsed else 0.0,
+            'done': self.done,
+        }
+
+    def stop(self):
+        """ Asks run() to checkpoint and return once the chunk it's on is done (safe from a signal handler). """
+        self.stopping = True
+
+    def _finished(self, hands, target, confidence, min_hands):
+        if self.stats.hands >= hands:
+            return 'hands'
+        if target is not None and self.stats.hands >= min_hands and self.interval(confidence)[1] <= target:
+            return 'target'
+        return None
+
+    def run(self, hands, target=None, confidence=0.95, min_hands=100_000, every=60, workers=1, on_progress=None):
+        """ Plays until there have been 'hands' hands in all (counting earlier runs), or until the
+            confidence interval is down to +/- 'target' bets (after at least 'min_hands' hands),
+            or until stop() is called. Checkpoints every 'every' seconds and on the way out.
+                workers = processes to play the streams on (1 = this one)
+                on_progress(progress) = called with self.progress() after every chunk
+            Returns why it stopped: 'hands', 'target' or 'stopped'. """
+        streams = len(self.states)
+        pool = ProcessPoolExecutor(min(workers, streams), initializer=_ignore_interrupts) if workers > 1 else None
+        last_save = time.monotonic()
+        self.stopping = False
+        try:
+            while True:
+                self.done = self._finished(hands, target, confidence, min_hands)
+                if self.done is not None:
+                    return self.done
+                if self.stopping:
+                    return 'stopped'
+                remaining = hands - self.stats.hands
+                sizes = [self.chunk] * streams if remaining >= self.chunk * streams else split(remaining, streams)
+                start = time.perf_counter()
+                if pool is not None:
+                    results = list(pool.map(_play, [self.rules] * streams, self.states, sizes))
+                else:
+                    results = [_play(self.rules, state, size) for state, size in zip(self.states, sizes)]
+#                 nothing changes until the whole chunk is in, so a checkpoint never holds half of one
+                for i, (state, stats) in enumerate(results):
+                    self.states[i] = state
+                    self.stats.merge(stats)
+                self.elapsed += time.perf_counter() - start
+                if on_progress is not None:
+                    on_progress(self.progress(confidence))
+                if time.monotonic() - last_save >= every:
+                    self.save()
+                    last_save = time.monotonic()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            self.save()
+
+    def result(self, confidence=0.95):
+        """ The rules, the progress and the full Stats, as a dict. """
+        res = {'rules': self.rules, 'seed': self.seed, 'streams': len(self.states)}
+        res.update(self.progress(confidence))
+        res['stats'] = self.stats.as_dict()
+        return res
+
+
+def _print_progress(progress):
+    import sys
+    print(f"{progress['hands']:>14,} hands   EV {progress['ev']:+.5f} ± {progress['half_width']:.5f} "
+          f"({progress['confidence']:.0%})   {progress['hands_per_second']:>9,.0f} hands/s", file=sys.stderr)
+
+
+def main(argv=None):
+    import argparse
+    import signal
+    import sys
+
+    parser = argparse.ArgumentParser(description="Long simulation runs that checkpoint themselves and can be resumed.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="start a job, or carry on with one from its checkpoint")
+    run_parser.add_argument('checkpoint', help="checkpoint file (resumed from if it's there)")
+    run_parser.add_argument('--hands', type=int, default=100_000_000, help="stop after this many hands in all")
+    run_parser.add_argument('--target', type=float, help="stop once the EV is known to +/- this many bets")
+    run_parser.add_argument('--confidence', type=float, default=0.95, help="confidence level for the interval (0-1)")
+    run_parser.add_argument('--min-hands', type=int, default=100_000, help="don't stop on --target before this many hands")
+    run_parser.add_argument('--every', type=float, default=60, help="seconds between checkpoints")
+    run_parser.add_argument('--workers', type=int, default=1, help="processes to play on")
+    run_parser.add_argument('--progress', metavar='FILE', help="also append every progress report to this file (JSON lines)")
+    run_parser.add_argument('--report-every', type=float, default=1, help="seconds between progress lines on stderr")
+    group = run_parser.add_argument_group("new jobs only (a resumed job keeps what it was started with)")
+    group.add_argument('--policy', choices=POLICIES, help="default: basic")
+    group.add_argument('--decks', type=int, help="default: 1")
+    group.add_argument('--penetration', type=float, help="how much of the shoe (0-1) to deal before reshuffling (default: 0, a fresh deck every hand)")
+    group.add_argument('--seed', type=int, help="default: 0")
+    group.add_argument('--streams', type=int, help="independent RNG streams (default: 4)")
+    group.add_argument('--chunk', type=int, help="hands per stream between reports (default: 50,000)")
+    status_parser = commands.add_parser('status', help="show how far a job has got")
+    status_parser.add_argument('checkpoint')
+    status_parser.add_argument('--confidence', type=float, default=0.95)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.checkpoint) and args.command == 'status':
+        parser.error(f"{args.checkpoint} doesn't exist")
+    try:
+        if args.command == 'status':
+            job = Job(args.checkpoint)
+        else:
+            job = Job(args.checkpoint, seed=args.seed, streams=args.streams, chunk=args.chunk,
+                      policy=args.policy, deck_count=args.decks, penetration=args.penetration)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.command == 'status':
+        print(json.dumps(job.result(args.confidence), indent=2))
+        return 0
+
+    if job.stats.hands:
+        print(f"Resuming {args.checkpoint} at {job.stats.hands:,} hands.", file=sys.stderr)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda signum, frame: job.stop())
+    log = open(args.progress, 'a') if args.progress else None
+    last_report = 0
+
+    def on_progress(progress):
+        nonlocal last_report
+        if log is not None:
+            log.write(json.dumps(progress) + '\n')
+            log.flush()
+        if time.monotonic() - last_report >= args.report_every:
+            _print_progress(progress)
+            last_report = time.monotonic()
+
+    try:
+        reason = job.run(args.hands, args.target, args.confidence, args.min_hands, args.every, args.workers, on_progress)
+    finally:
+        if log is not None:
+            log.close()
+    _print_progress(job.progress(args.confidence))
+    if reason == 'stopped':
+        print(f"Stopped. Run it again to carry on from {args.checkpoint}.", file=sys.stderr)
+    print(json.dumps(job.result(args.confidence), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    main()
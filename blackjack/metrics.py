@@ -0,0 +1,202 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+# Where the time goes in a hand.
+# Timers and counters are sprinkled through the hot paths (deck API calls, drawing, rendering,
+# each phase of a round, waiting on the player), and the results are kept as histograms.
+# Everything is off unless BLACKJACK_METRICS is set; when it's off, timer() hands back the same
+# do-nothing context manager every time and count()/observe() return right away, so the
+# game pays about one function call per instrumented spot.
+#
+#   BLACKJACK_METRICS=metrics.json python -m blackjack play    (or metrics.prom for Prometheus text)
+#
+# The file is written when the player quits (Player.quit), and whenever write() is called
+# (on Linux/macOS, `kill -USR1 <pid>` does that for a running game).
+
+# upper bounds (in seconds) of the histogram buckets, plus +Inf
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# where to write the metrics (None = don't)
+OUTPUT = os.environ.get("BLACKJACK_METRICS") or None
+enabled = OUTPUT is not None
+
+_lock = threading.Lock()
+# (name, labels) -> Histogram / int
+_histograms = {}
+_counters = {}
+
+
+class Histogram:
+    """ Counts of observed values per bucket, plus their sum. """
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """ Roughly the q-th quantile (0-1): the upper bound of the bucket it falls in. """
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return 0.0
+
+
+class _Timer:
+    __slots__ = ('name', 'labels', 'start')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL = _NullTimer()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def timer(name, **labels):
+    """ with timer('draw_seconds'): ... adds how long the block took to a histogram. """
+    if not enabled:
+        return _NULL
+    return _Timer(name, labels)
+
+
+def observe(name, value, **labels):
+    """ Adds a value (seconds) to a histogram. """
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram()
+        hist.observe(value)
+
+
+def count(name, amount=1, **labels):
+    """ Adds to a counter. """
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def enable(output=None):
+    """ Turns metrics on (from code instead of BLACKJACK_METRICS). """
+    global enabled, OUTPUT
+    enabled = True
+    if output is not None:
+        OUTPUT = output
+    _write_on_signal()
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _label_text(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+def to_json():
+    """ Everything so far as a JSON string. """
+    with _lock:
+        data = {
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in sorted(_counters.items())],
+            'histograms': [{'name': name, 'labels': dict(labels), 'count': hist.count, 'sum': hist.sum,
+                            'p50': hist.quantile(0.5), 'p99': hist.quantile(0.99),
+                            'buckets': dict(zip([str(b) for b in BUCKETS] + ['+Inf'], hist.counts))}
+                           for (name, labels), hist in sorted(_histograms.items())],
+        }
+    return json.dumps(data, indent=2)
+
+
+def to_prometheus():
+    """ Everything so far in the Prometheus text format. """
+    lines = []
+    typed = set()
+    with _lock:
+        for (name, labels), value in sorted(_counters.items()):
+            name = f'blackjack_{name}_total'
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name}{_label_text(labels)} {value}')
+        for (name, labels), hist in sorted(_histograms.items()):
+            name = f'blackjack_{name}'
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} histogram')
+            cumulative = 0
+            for bound, count in zip([str(b) for b in BUCKETS] + ['+Inf'], hist.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_label_text(labels, le=bound)} {cumulative}')
+            lines.append(f'{name}_sum{_label_text(labels)} {hist.sum}')
+            lines.append(f'{name}_count{_label_text(labels)} {hist.count}')
+    return '\n'.join(lines) + '\n'
+
+
+def write(path=None):
+    """ Writes everything so far to 'path' (OUTPUT by default): Prometheus text if it ends
+        in .prom or .txt, JSON otherwise. Returns the path, or None if there's nowhere to write. """
+    path = path or OUTPUT
+    if path is None:
+        return None
+    text = to_prometheus() if path.endswith(('.prom', '.txt')) else to_json()
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+
+def _write_on_signal():
+    import signal
+    if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, lambda signum, frame: write())
+
+
+if enabled:
+    _write_on_signal()
@@ -0,0 +1,43 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .simulation import Simulator, Stats
+
+# Splits a big simulation across all the cores.
+# Every chunk of hands gets its own RNG stream, worked out from (seed, chunk number),
+# and Stats only hold ints, so merging the chunks in whatever order they finish
+# gives the exact same answer for the same seed and worker count.
+
+
+def stream_seed(seed, index):
+    """ Returns the RNG seed for chunk number 'index' of a run seeded with 'seed'. """
+    digest = hashlib.sha256(f"{seed}:{index}".encode()).digest()
+    return int.from_bytes(digest[:16], 'big')
+
+
+def split(hands, parts):
+    """ Splits 'hands' into 'parts' sizes that differ by at most one. """
+    size, extra = divmod(hands, parts)
+    return [size + (i < extra) for i in range(parts)]
+
+
+def _run_chunk(hands, seed, rules):
+    return Simulator(seed=seed, **rules).run(hands)
+
+
+def run(hands, workers=None, seed=0, chunks_per_worker=4, on_progress=None, **rules):
+    """ Plays 'hands' hands across a pool of 'workers' processes and returns the merged Stats.
+            rules = passed on to Simulator (policy, insure, deck_count, penetration);
+                    policies have to be module-level functions so they can be pickled
+            on_progress(stats) = called with the running totals every time a chunk finishes """
+    workers = workers or os.cpu_count() or 1
+    sizes = [size for size in split(hands, workers * chunks_per_worker) if size]
+    total = Stats()
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_run_chunk, size, stream_seed(seed, i), rules) for i, size in enumerate(sizes)]
+        for future in as_completed(futures):
+            total.merge(future.result())
+            if on_progress is not None:
+                on_progress(total)
+    return total
@@ -0,0 +1,95 @@
+from . import metrics
+from . import terminal
+from .terminal import CLEAR_BELOW, CLEAR_LINE, CLEAR_SCREEN, HOME, move_to
+
+# Draws the table.
+# Every card's art is built once up front (GLYPHS), and a whole frame
+# (dealer's hand + my hand) is put together as a list of lines and sent to the
+# terminal in a single write. After the first frame, only the lines that changed
+# get rewritten, which keeps redraws cheap over slow SSH/terminal links.
+# That only works while the last frame is still where it was drawn: if the frame doesn't fit on
+# the terminal, or the text printed under it (messages, prompts, answers) has scrolled it up,
+# the next frame is drawn in full.
+# (When the output isn't a terminal, every frame is just written out in full.)
+
+RANK_LABELS = ('  A  ', '  2  ', '  3  ', '  4  ', '  5  ', '  6  ', '  7  ',
+               '  8  ', '  9  ', ' 1 0 ', '  J  ', '  Q  ', '  K  ')
+SUIT_ICONS = ('♠', '♦', '♣', '♥')   # same order as shoe.SUIT_NAMES
+
+
+def _glyph(card):
+    return ('╭─────╮', f'│{RANK_LABELS[card % 13]}│', '│     │', f'│  {SUIT_ICONS[card // 13]}  │', '╰─────╯')
+
+
+# card art for every int card (0-51), five lines each
+GLYPHS = tuple(_glyph(card) for card in range(52))
+# the dealer's face-down card
+BACK = ('╭┬┬┬┬┬╮', '├╳╳╳╳╳┤', '├╳╳╳╳╳┤', '├╳╳╳╳╳┤', '╰┴┴┴┴┴╯')
+# an empty spot on the table
+EMPTY = ('', '', '', '', '')
+
+
+def card_text(card):
+    """ A card as a couple of characters ('A♠', '10♦'), for when there isn't room for the art. """
+    return RANK_LABELS[card % 13].replace(' ', '') + SUIT_ICONS[card // 13]
+
+
+def hand_rows(cards, face_down=0):
+    """ Returns the five lines of art for a hand of int cards,
+        with the last 'face_down' cards shown as card backs. """
+    glyphs = [GLYPHS[card] for card in cards]
+    if face_down:
+        glyphs[-face_down:] = [BACK] * face_down
+    if not glyphs:
+        return list(EMPTY)
+    return [' '.join(glyph[row] for glyph in glyphs) + ' ' for row in range(5)]
+
+
+class Screen:
+    """ Knows what's on the terminal so a redraw only has to send the lines that changed. """
+
+    def __init__(self, term=None):
+        self.term = term or terminal.terminal
+        self.lines = None
+        # term.newlines right after the last frame, to tell how much has been printed under it
+        self.mark = 0
+
+    def reset(self):
+        """ Forgets what's on screen (something else cleared or scrolled it), so the next frame is drawn in full. """
+        self.lines = None
+
+    def clear(self):
+        """ Clears the whole screen. """
+        self.term.clear()
+        self.reset()
+
+    def draw(self, lines):
+        """ Shows a frame at the top of the screen, and clears everything below it. """
+        with metrics.timer('render_seconds'):
+            self._draw(lines)
+
+    def _draw(self, lines):
+        if not self.term.ansi:
+            self.term.write('\n'.join(lines) + '\n')
+            return
+        if self.lines is not None:
+            height = self.term.height
+            below = self.term.newlines - self.mark
+            if len(self.lines) + below >= height or len(lines) >= height:
+#                 the last frame (or this one) has scrolled, so its rows aren't where they were
+                self.lines = None
+        if self.lines is None:
+            out = [HOME, CLEAR_SCREEN, '\n'.join(lines), '\n']
+        else:
+            out = []
+            for row, line in enumerate(lines):
+                if row >= len(self.lines) or self.lines[row] != line:
+                    out.append(move_to(row) + line + CLEAR_LINE)
+            out.append(move_to(len(lines)))
+        out.append(CLEAR_BELOW)
+        self.lines = lines
+        self.term.write(''.join(out))
+        self.mark = self.term.newlines
+
+
+screen = Screen()
@@ -0,0 +1,142 @@
+import argparse
+import contextlib
+import io
+
+from . import game as bj
+from . import metrics
+from . import render
+from .deck_pool import DeckError
+from .history import HistoryWriter
+from .terminal import Terminal
+
+# Hosts lots of Blackjack tables at once over plain TCP (telnet-style, one line per answer).
+# Every connection gets its own Player, Dealer and Game, and all of them share one event loop:
+# waiting on a player's answer, the pacing between cards, and anything that has to go out
+# to the deck API are all awaited, so a slow or idle player never holds up anyone else.
+#
+#   python -m blackjack serve --port 2323
+#   telnet localhost 2323
+
+# phases that draw cards, and how many cards they can draw
+DRAWS = {
+    bj.DEAL: 1,
+    bj.PLAYER_HIT: 1,
+    bj.DOUBLE_DOWN: 1,
+    bj.DEALER_HIT: 1,
+}
+
+
+class Table:
+    """ One player's game, with everything it prints going back down their connection. """
+
+    def __init__(self, reader, writer, money=100, pace=1, ansi=True, history=None):
+        self.reader = reader
+        self.writer = writer
+        self.out = io.StringIO()
+        self.term = Terminal(self.out, ansi=ansi)
+        self.player = bj.Player(None, money, 0)
+        self.dealer = bj.Dealer(None, self.player)
+        self.dealer.screen = render.Screen(self.term)
+        self.game = bj.Game(self.dealer, self.player, pace=pace, history=history, out=self.term)
+
+    def step(self, answer=None):
+        """ Runs one step of the game and returns what it printed. """
+        self.game.step(answer)
+        return self.flush_text()
+
+    def flush_text(self):
+        text = self.out.getvalue()
+        self.out.seek(0)
+        self.out.truncate()
+        return text
+
+    async def send(self, text):
+        if text:
+            self.writer.write(text.replace('\n', '\r\n').encode())
+            await self.writer.drain()
+
+    async def get_ready(self):
+        """ Does anything the next step would otherwise block on, off the event loop. """
+        import asyncio
+        phase = self.game.phase
+        if phase == bj.START and bj.needs_new_deck(self.player):
+            await asyncio.to_thread(bj.new_deck, self.dealer, self.player)
+        elif phase in DRAWS:
+            await asyncio.to_thread(self.player.deck.ready, DRAWS[phase])
+
+    async def run(self):
+        import asyncio
+        game = self.game
+        while not game.over:
+            if game.pause:
+                with metrics.timer('pace_seconds'):
+                    await asyncio.sleep(game.pause)
+            await self.get_ready()
+            if game.prompt is None:
+                await self.send(self.step())
+                continue
+            self.term.write(game.prompt)
+            await self.send(self.flush_text())
+            with metrics.timer('input_wait_seconds', phase=game.phase):
+                line = await self.reader.readline()
+            if not line:
+#                 they hung up
+                break
+            self.term.entered()
+            await self.send(self.step(line.decode(errors='replace').strip()))
+
+    def close(self):
+        if self.player.deck is not None:
+            self.player.deck.close()
+            bj.get_deck_pool().release(self.player.deck.deck_id)
+        self.writer.close()
+
+
+async def serve(host, port, **table_options):
+    import asyncio
+
+    async def handle(reader, writer):
+        table = Table(reader, writer, **table_options)
+        try:
+            await table.run()
+        except DeckError as e:
+            with contextlib.suppress(ConnectionError):
+                await table.send(f"\n{e} Please come back later.\n")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            table.close()
+
+    server = await asyncio.start_server(handle, host, port, backlog=1024)
+    print(f"Serving Blackjack on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host Blackjack tables over TCP.")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=2323)
+    parser.add_argument('--money', type=float, default=100, help="starting wallet for every player")
+    parser.add_argument('--pace', type=float, default=1, help="seconds between cards")
+    parser.add_argument('--pool-size', type=int, default=bj.POOL_SIZE, help="shuffled decks to keep ready")
+    parser.add_argument('--no-ansi', dest='ansi', action='store_false', help="send plain frames, no escape codes")
+    parser.add_argument('--history', metavar='FILE', help="log every hand at every table to this file")
+    args = parser.parse_args(argv)
+#     asyncio takes longer to import than everything else here put together, so only once it's needed
+    import asyncio
+#     the pool isn't made until the first table needs a deck
+    bj.POOL_SIZE = args.pool_size
+    history = HistoryWriter(args.history) if args.history else None
+    try:
+        asyncio.run(serve(args.host, args.port, money=args.money, pace=args.pace, ansi=args.ansi, history=history))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if history is not None:
+            history.close()
+    metrics.write()
+
+
+if __name__ == "__main__":
+    main()
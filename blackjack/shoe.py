@@ -0,0 +1,115 @@
+import random
+import uuid
+from array import array
+
+# Offline stand-in for the deckofcardsapi.com deck.
+# Cards are stored as ints 0-51 (suit * 13 + rank) in a compact shuffled array,
+# and handed back to the game in the same JSON shape the API uses,
+# so Dealer.deal and Player.hit don't know the difference.
+
+RANK_CODES = ('A', '2', '3', '4', '5', '6', '7', '8', '9', '0', 'J', 'Q', 'K')
+RANK_NAMES = ('ACE', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'JACK', 'QUEEN', 'KING')
+SUIT_CODES = ('S', 'D', 'C', 'H')
+SUIT_NAMES = ('SPADES', 'DIAMONDS', 'CLUBS', 'HEARTS')
+
+IMAGE_URL = "https://deckofcardsapi.com/static/img/{}.png"
+
+# every shoe that has been handed out, by deck_id
+_shoes = {}
+# picks the seed for each new shoe, so a seeded game is repeatable across rounds
+_seeder = random.Random()
+
+
+def card_code(card):
+    """ Takes in an int card (0-51) and returns the API code, e.g. 'AS' or '0H'. """
+    return RANK_CODES[card % 13] + SUIT_CODES[card // 13]
+
+
+def card_dict(card):
+    """ Takes in an int card (0-51) and returns it as a single API card object. """
+    code = card_code(card)
+    return {
+        'code': code,
+        'image': IMAGE_URL.format(code),
+        'value': RANK_NAMES[card % 13],
+        'suit': SUIT_NAMES[card // 13],
+    }
+
+
+class LocalShoe:
+    """ A shuffled shoe of one or more decks that lives in memory. """
+
+    def __init__(self, deck_count=1, seed=None, deck_id=None):
+        self.deck_id = deck_id or uuid.uuid4().hex[:12]
+        self.deck_count = deck_count
+        self.rng = random.Random(seed)
+        self.cards = array('B', range(52)) * deck_count
+        self.pos = 0
+        self.shuffle()
+
+    @property
+    def remaining(self):
+        return len(self.cards) - self.pos
+
+    def shuffle(self):
+        """ Puts every card back in the shoe and shuffles it. """
+        self.rng.shuffle(self.cards)
+        self.pos = 0
+
+    def draw(self, count=1):
+        """ Returns a list of up to 'count' int cards off the top of the shoe. """
+        drawn = self.cards[self.pos:self.pos + count].tolist()
+        self.pos += len(drawn)
+        return drawn
+
+    def _get(self, action):
+        """ Answers the same actions as Deck._get, with the same JSON the API sends back:
+                draw / draw/?count=N = draw cards from the shoe (without replacement)
+                shuffle / return = put all cards back (shuffle also reshuffles them) """
+        action, _, query = action.strip('/').partition('/?')
+        if action == 'draw':
+            count = 1
+            if query.startswith('count='):
+                count = int(query[len('count='):])
+            cards = self.draw(count)
+            res = {
+                'success': len(cards) == count,
+                'deck_id': self.deck_id,
+                'cards': [card_dict(card) for card in cards],
+                'remaining': self.remaining,
+            }
+            if not res['success']:
+                res['error'] = f"Not enough cards remaining to draw {count} additional"
+            return res
+        elif action in {'shuffle', 'return'}:
+            if action == 'shuffle':
+                self.shuffle()
+            else:
+                self.pos = 0
+            return {'success': True, 'deck_id': self.deck_id, 'shuffled': action == 'shuffle',
+                    'remaining': self.remaining}
+        print(f"There was an error {action}ing the card(s).")
+
+
+def seed_shoes(seed):
+    """ Makes every shoe from now on come out in a repeatable order. """
+    _seeder.seed(seed)
+
+
+def new_deck(deck_count=1, seed=None):
+    """ Makes a new shuffled local shoe and returns the same JSON as the API's new/shuffle. """
+    if seed is None:
+        seed = _seeder.getrandbits(64)
+    shoe = LocalShoe(deck_count, seed)
+    _shoes[shoe.deck_id] = shoe
+    return {'success': True, 'deck_id': shoe.deck_id, 'shuffled': True, 'remaining': shoe.remaining}
+
+
+def get_shoe(deck_id):
+    """ Returns the local shoe for this deck_id, or None if it's a remote (API) deck. """
+    return _shoes.get(deck_id)
+
+
+def discard(deck_id):
+    """ Forgets about a local shoe once the game is done with it. """
+    _shoes.pop(deck_id, None)
@@ -0,0 +1,292 @@
+import random
+
+from .hand import VALUES
+
+# Headless version of the game: the same dealing, hit/stand/double, insurance
+# and settlement rules as Dealer/Player, but with no input(), print, cls or sleep,
+# so it can play millions of hands to measure the house edge.
+#
+# Rules, as the game plays them:
+#   - deal goes player, dealer (up), player, dealer (hole)
+#   - dealer showing an ace offers insurance (up to half the bet, pays 2:1)
+#     and then checks for a Blackjack; if it has one the round is over
+#     (player Blackjack ties, everyone else loses the bet)
+#   - otherwise a player Blackjack wins 1.5x right away
+#   - player can hit, stand, or double down (double the bet, take one card)
+#   - player over 21 loses without the dealer playing
+#   - dealer hits below 17 and stands on every 17 (soft ones too)
+#   - higher hand wins; a tie loses to a dealer Blackjack, otherwise it's a tie
+#
+# Hands are tracked the same way hand.Hand does it (a running total plus the
+# number of aces still counted as 11), just inline in plain ints for speed.
+#
+# All money is counted in half-bets (ints), so 1.5x payouts and insurance
+# add up exactly and results can be merged without rounding.
+
+HIT = 'h'
+STAND = 's'
+DOUBLE = 'd'
+
+
+def basic_strategy(total, soft, upcard, first):
+    """ A standard basic-strategy chart for these rules.
+        total = player's hand value, soft = True if an ace is still counted as 11,
+        upcard = dealer's face-up card value (ace is 11),
+        first = True if this is the first decision (only two cards) """
+    if soft:
+        if total >= 19:
+            return STAND
+        if total == 18:
+            if first and 3 <= upcard <= 6:
+                return DOUBLE
+            return STAND if upcard in {2, 7, 8} else HIT
+        if first and (total == 17 and 3 <= upcard <= 6
+                      or total >= 15 and 4 <= upcard <= 6
+                      or 5 <= upcard <= 6):
+            return DOUBLE
+        return HIT
+    if total >= 17:
+        return STAND
+    if total >= 13:
+        return STAND if upcard <= 6 else HIT
+    if total == 12:
+        return STAND if 4 <= upcard <= 6 else HIT
+    if first and (total == 11
+                  or total == 10 and upcard <= 9
+                  or total == 9 and 3 <= upcard <= 6):
+        return DOUBLE
+    return HIT
+
+
+def mimic_dealer(total, soft, upcard, first):
+    """ Plays like the dealer: hit below 17, otherwise stand. """
+    return HIT if total < 17 else STAND
+
+
+def never_insure(total, soft):
+    return False
+
+
+class Stats:
+    """ Running totals for a batch of hands. 'net' and 'net_sq' are in half-bets. """
+    __slots__ = ('hands', 'wins', 'losses', 'pushes', 'blackjacks', 'doubles', 'insured', 'net', 'net_sq')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def record(self, net):
+        self.hands += 1
+        if net > 0:
+            self.wins += 1
+        elif net < 0:
+            self.losses += 1
+        else:
+            self.pushes += 1
+        self.net += net
+        self.net_sq += net * net
+
+    def merge(self, other):
+        """ Adds another Stats into this one. """
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    @property
+    def units(self):
+        """ Total won (or lost, if negative) in bets. """
+        return self.net / 2
+
+    @property
+    def ev(self):
+        """ Average result per hand, in bets. """
+        return self.net / 2 / self.hands if self.hands else 0.0
+
+    @property
+    def variance(self):
+        """ Variance of the result per hand, in bets squared. """
+        if self.hands < 2:
+            return 0.0
+        mean = self.net / self.hands
+        return (self.net_sq - mean * self.net) / (self.hands - 1) / 4
+
+    @property
+    def blackjack_rate(self):
+        return self.blackjacks / self.hands if self.hands else 0.0
+
+    def as_dict(self):
+        res = {name: getattr(self, name) for name in self.__slots__}
+        res.update(units=self.units, ev=self.ev, variance=self.variance, blackjack_rate=self.blackjack_rate)
+        return res
+
+
+class Simulator:
+    """ Plays hands with no I/O.
+            policy(total, soft, upcard, first) = returns HIT, STAND or DOUBLE
+            insure(total, soft) = returns True to take full insurance (half the bet)
+            deck_count = number of decks in the shoe
+            penetration = how much of the shoe (0-1) gets dealt before a reshuffle;
+                          0 means a fresh deck every hand, like the game does """
+
+    def __init__(self, policy=basic_strategy, insure=never_insure, deck_count=1, penetration=0, seed=None):
+        self.policy = policy
+        self.insure = insure
+        self.rng = random.Random(seed)
+        self.random = self.rng.random
+        self.cards = [VALUES[card % 13] for card in range(52)] * deck_count
+        self.size = len(self.cards)
+        self.cut = int(self.size * penetration)
+        self.pos = 0
+
+    def draw(self):
+        """ Deals one card value. The shoe is shuffled as it's dealt (one Fisher-Yates step per card),
+            so reshuffling is free and a fresh deck per hand costs nothing extra.
+            If the shoe runs out partway through a hand it's reshuffled, like game.Deck does. """
+        cards = self.cards
+        pos = self.pos
+        if pos == self.size:
+            pos = 0
+        j = pos + int(self.random() * (self.size - pos))
+        card = cards[j]
+        cards[j] = cards[pos]
+        cards[pos] = card
+        self.pos = pos + 1
+        return card
+
+    def play_hand(self, stats=None):
+        """ Plays one hand and returns the player's result in half-bets. """
+        if self.pos >= self.cut:
+            self.pos = 0
+        draw = self.draw
+        p1 = draw()
+        up = draw()
+        p2 = draw()
+        hole = draw()
+        net = 0
+        player_bj = p1 + p2 == 21
+        dealer_bj = up + hole == 21
+
+        if up == 11:
+            if self.insure(p1 + p2, p1 == 11 or p2 == 11):
+                net += 2 if dealer_bj else -1
+                if stats is not None:
+                    stats.insured += 1
+            if dealer_bj:
+                return net if player_bj else net - 2
+        if player_bj:
+            if stats is not None:
+                stats.blackjacks += 1
+            return net + 3
+
+#         player's turn
+        total = p1 + p2
+        soft = (p1 == 11) + (p2 == 11)
+        if total > 21:
+            total -= 10
+            soft -= 1
+        bet = 2
+        policy = self.policy
+        first = True
+        while True:
+            action = policy(total, soft > 0, up, first)
+            if action == STAND:
+                break
+            card = draw()
+            total += card
+            if card == 11:
+                soft += 1
+            while total > 21 and soft:
+                total -= 10
+                soft -= 1
+            if action == DOUBLE:
+                bet = 4
+                if stats is not None:
+                    stats.doubles += 1
+            if total > 21:
+                return net - bet
+            if action == DOUBLE:
+                break
+            first = False
+
+#         dealer's turn
+        dealer = up + hole
+        dealer_soft = (up == 11) + (hole == 11)
+        if dealer > 21:
+            dealer -= 10
+            dealer_soft -= 1
+        while dealer < 17:
+            card = draw()
+            dealer += card
+            if card == 11:
+                dealer_soft += 1
+#             'if' is enough here: the dealer stands on every 17, so a soft hand never gets another
+#             card at 17 or more, and one more card can't push it over by two aces' worth
+            if dealer > 21 and dealer_soft:
+                dealer -= 10
+                dealer_soft -= 1
+        if dealer > 21 or total > dealer:
+            return net + bet
+        if total < dealer or dealer_bj:
+            return net - bet
+        return net
+
+    def run(self, hands, stats=None):
+        """ Plays 'hands' hands and returns the Stats (added to 'stats' if given). """
+        if stats is None:
+            stats = Stats()
+        play_hand = self.play_hand
+        record = stats.record
+        for _ in range(hands):
+            record(play_hand(stats))
+        return stats
+
+
+def simulate(hands, seed=None, **rules):
+    """ Plays 'hands' hands with a new Simulator and returns the Stats. """
+    return Simulator(seed=seed, **rules).run(hands)
+
+
+POLICIES = {'basic': basic_strategy, 'dealer': mimic_dealer}
+
+
+def main(argv=None):
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Play lots of hands with no I/O and print the results as JSON.")
+    parser.add_argument('--hands', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--decks', type=int, default=1)
+    parser.add_argument('--penetration', type=float, default=0,
+                        help="how much of the shoe (0-1) to deal before reshuffling (0 = a fresh deck every hand)")
+    parser.add_argument('--policy', choices=('basic', 'dealer', 'exact'), default='basic',
+                        help="basic strategy, play like the dealer, or the exact best play (see tables.py)")
+    parser.add_argument('--workers', type=int, help="split the hands across this many processes (see parallel.py)")
+    parser.add_argument('--numpy', action='store_true', help="play in NumPy batches (see vectorized.py)")
+    args = parser.parse_args(argv)
+    if args.numpy and (args.penetration or args.workers):
+        parser.error("--numpy deals a fresh deck every hand in one process (no --penetration or --workers)")
+
+    if args.policy == 'exact':
+        from . import tables
+        policy = tables.load(args.decks)
+    else:
+        policy = POLICIES[args.policy]
+    start = time.perf_counter()
+    if args.numpy:
+        from . import vectorized
+        stats = vectorized.simulate(args.hands, policy, args.decks, args.seed)
+    elif args.workers:
+        from . import parallel
+        stats = parallel.run(args.hands, args.workers, args.seed or 0,
+                             policy=policy, deck_count=args.decks, penetration=args.penetration)
+    else:
+        stats = simulate(args.hands, args.seed, policy=policy, deck_count=args.decks, penetration=args.penetration)
+    result = stats.as_dict()
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
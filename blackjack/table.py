@@ -0,0 +1,501 @@
+from . import game
+from . import metrics
+from . import render
+from .game import (BET, DEAL, DEALER_HIT, DEALER_TURN, INSURANCE, PEEK, PLAY_AGAIN, PLAYER_TURN,
+                   QUIT, SETTLE, START)
+from .hand import VALUES, Hand, card_from_api
+from .history import DEALER_BLACKJACK, DOUBLED, INSURED, PLAYER_BLACKJACK, SPLIT
+
+# A table with up to 7 seats against one dealer (game.Game is the classic one-seat game).
+# Every seat has its own wallet and bet, and can split a pair into more hands.
+#
+# The cards for the deal all come out of the shoe in one draw (two per seat plus the dealer's two,
+# so one API call for a remote deck) and get handed out in the usual order afterwards. Nobody's
+# money moves until the dealer is done: then every hand at the table is settled in one pass
+# against the dealer's final hand. So a round costs one draw per card, however many seats there are,
+# rather than a round trip per seat.
+#
+# Rules are the ones in simulation.py, plus splitting:
+#   - two cards of the same value can be split into two hands, each with the original bet,
+#     up to MAX_HANDS hands per seat; split aces get one more card each and that's it
+#   - doubling (first two cards only) is allowed after a split, and 21 on a split hand isn't a Blackjack
+#   - hands that reach 21 stand on their own
+#
+# Driven the same way as game.Game, so game.play runs it in a terminal (seats take turns at the keyboard).
+
+MAX_SEATS = 7
+MAX_HANDS = 4
+MIN_BET = 5
+# lines to leave free under the table for messages and the prompt
+MESSAGE_ROWS = 4
+
+# what to ask whichever seat is up
+PROMPTS = {
+    BET: "SEAT {seat} BET (0 to sit out): $",
+    INSURANCE: "SEAT {seat}: insure up to ${max_insurance:.2f} (0 for none): $",
+    PLAYER_TURN: "\nSEAT {seat}{hand}: (H)IT / (S)TAND / (D)OUBLE DOWN{split}: ",
+    PLAY_AGAIN: "Another round? (Y/N): ",
+}
+
+
+class SeatHand:
+    """ One of a seat's hands (a seat has more than one after a split).
+            net = what it won or lost once it's settled (None until then) """
+    __slots__ = ('hand', 'bet', 'split', 'decisions', 'done', 'net')
+
+    def __init__(self, bet, cards=(), split=False):
+        self.hand = Hand(cards)
+        self.bet = bet
+        self.split = split
+        self.decisions = ''
+        self.done = False
+        self.net = None
+
+    @property
+    def blackjack(self):
+        return self.hand.blackjack and not self.split
+
+    @property
+    def pair(self):
+        cards = self.hand.cards
+        return len(cards) == 2 and VALUES[cards[0] % 13] == VALUES[cards[1] % 13]
+
+    def status(self):
+        """ A few words on the hand for the screen, e.g. '18  BET $10.00'. """
+        if self.blackjack:
+            text = "BLACKJACK!"
+        elif self.hand.bust:
+            text = "BUST"
+        else:
+            text = str(self.hand.total)
+        text += f"  BET ${self.bet:.2f}"
+        if 'd' in self.decisions:
+            text += " (DOUBLED)"
+        if self.net is not None:
+            text += "  WIN" if self.net > 0 else "  LOSE" if self.net < 0 else "  PUSH"
+        return text
+
+
+class Seat:
+    """ One player at the table.
+            hands = their hands this round (empty if they're sitting it out) """
+
+    def __init__(self, number, money):
+        self.number = number
+        self.money = money
+        self.original_money = money
+        self.insurance = 0
+        self.hands = []
+
+    @property
+    def playing(self):
+        return bool(self.hands)
+
+    @property
+    def can_bet(self):
+        return self.money >= MIN_BET
+
+    @property
+    def committed(self):
+        """ Everything the seat has riding on this round. """
+        return sum(seat_hand.bet for seat_hand in self.hands) + self.insurance
+
+    def hand_lines(self, active=None):
+        """ Returns the seat's part of the table as lines, with an arrow at the hand being played. """
+        lines = ["", f"----- SEAT {self.number} -----  WALLET: ${self.money:.2f}"
+                 + (f"  INSURANCE: ${self.insurance:.2f}" if self.insurance else "")]
+        if not self.hands:
+            lines.append("(sitting out)")
+        for seat_hand in self.hands:
+            rows = render.hand_rows(seat_hand.hand)
+            rows[2] += "  " + seat_hand.status() + ("  <--" if seat_hand is active else "")
+            lines += rows
+        return lines
+
+    def summary_line(self):
+        """ The seat on one line (cards as text instead of art), for when the whole table doesn't fit. """
+        hands = "  |  ".join(' '.join(render.card_text(card) for card in seat_hand.hand) + "  " + seat_hand.status()
+                             for seat_hand in self.hands) or "(sitting out)"
+        return f"SEAT {self.number} (${self.money:.2f}): {hands}"
+
+
+class TableGame:
+    """ Runs a table of 1-7 seats one phase at a time. Works like game.Game:
+            loop until game.over; if game.prompt is None call game.step(),
+            otherwise get an answer to game.prompt (from whichever seat it names) and call game.step(answer),
+            waiting game.pause seconds in between.
+        Every seat starts with 'money'. If 'history' (a HistoryWriter) is given, every settled hand gets logged to it.
+        Everything the game prints goes to 'out' (a terminal.Terminal, the screen's by default). """
+
+    def __init__(self, seats=2, money=100, pace=1, history=None, screen=None, out=None):
+        if not 1 <= seats <= MAX_SEATS:
+            raise ValueError(f"A table has 1-{MAX_SEATS} seats.")
+        self.seats = [Seat(number, money) for number in range(1, seats + 1)]
+        self.dealer = Hand()
+        self.revealed = False
+        self.deck = None
+        self.pace = pace
+        self.history = history
+        self.screen = screen or render.screen
+        self.out = out or self.screen.term
+        # whose turn it is: an index into self.seats, and which of their hands
+        self.turn = 0
+        self.hand_index = 0
+        self.pause = 0
+        self.phase = START
+        self.phases = {
+            START: self.start,
+            BET: self.place_bet,
+            DEAL: self.deal,
+            INSURANCE: self.insure,
+            PEEK: self.peek,
+            PLAYER_TURN: self.take_turn,
+            DEALER_TURN: self.dealer_turn,
+            DEALER_HIT: self.dealer_hit,
+            SETTLE: self.settle,
+            PLAY_AGAIN: self.play_again,
+        }
+
+    @property
+    def over(self):
+        return self.phase == QUIT
+
+    @property
+    def seat(self):
+        return self.seats[self.turn]
+
+    @property
+    def prompt(self):
+        """ What to ask (and which seat is being asked), or None if the next step doesn't need an answer. """
+        if self.phase not in PROMPTS:
+            return None
+        if self.phase == PLAY_AGAIN:
+            return PROMPTS[PLAY_AGAIN]
+        seat = self.seat
+        hand = ''
+        split = ''
+        if self.phase == PLAYER_TURN:
+            seat_hand = seat.hands[self.hand_index]
+            if len(seat.hands) > 1:
+                hand = f" (HAND {self.hand_index + 1})"
+            if seat_hand.pair and len(seat.hands) < MAX_HANDS:
+                split = " / S(P)LIT"
+        return PROMPTS[self.phase].format(seat=seat.number, hand=hand, split=split,
+                                          max_insurance=seat.hands[0].bet / 2 if seat.hands else 0)
+
+    def step(self, answer=None):
+        """ Runs the current phase and moves on to the next one. """
+        phase = self.phase
+        with metrics.timer('phase_seconds', phase=phase):
+            if phase in PROMPTS:
+                self.phase = self.phases[phase](answer)
+            else:
+                self.phase = self.phases[phase]()
+#         a second after the deal, and before each dealer move
+        self.pause = self.pace if phase == DEAL or self.phase in {DEALER_HIT, SETTLE} else 0
+        return self.phase
+
+    def show(self, active=None):
+        """ Draws the whole table (dealer's hand, then every seat) in one go,
+            pointing out the 'active' hand (the one being played) if there is one.
+            If that's too tall for the terminal, the seats (apart from the one playing) get one line each. """
+        if self.revealed:
+            lines = ["--- DEALER HAND ---"] + render.hand_rows(self.dealer)
+        else:
+            lines = ["--- DEALER HAND ---"] + render.hand_rows(self.dealer.cards[:2], face_down=1 if len(self.dealer) == 2 else 0)
+        table = [line for seat in self.seats for line in seat.hand_lines(active)]
+        if len(lines) + len(table) + MESSAGE_ROWS > self.screen.term.height:
+            table = [""]
+            for seat in self.seats:
+                if active is not None and any(seat_hand is active for seat_hand in seat.hands):
+                    table += seat.hand_lines(active) + [""]
+                else:
+                    table.append(seat.summary_line())
+        self.screen.draw(lines + table)
+
+    def _next_seat(self, start, test):
+        """ The index of the first seat from 'start' on that passes test(seat), or None. """
+        for index in range(start, len(self.seats)):
+            if test(self.seats[index]):
+                return index
+        return None
+
+    def _draw(self, count):
+        """ Returns 'count' int cards from the shoe, in as few draws as it takes (one, unless it runs out). """
+        cards = []
+        while len(cards) < count:
+            drawn = self.deck.draw(count - len(cards))
+            if not drawn:
+                raise RuntimeError("Couldn't draw any cards.")
+            cards += [card_from_api(card) for card in drawn]
+        return cards
+
+    def start(self):
+        """ Starts a new round: gets a freshly shuffled shoe once the cut card is out, and asks for bets. """
+        self.screen.clear()
+        first = self._next_seat(0, lambda seat: seat.can_bet)
+        if first is None:
+            print("Nobody has enough left for the minimum bet.", file=self.out)
+            self.quit()
+            return QUIT
+        if self.deck is None or self.deck.needs_shuffle:
+            self.deck = game.next_deck(self.deck)
+            self.deck.out = self.out
+        for seat in self.seats:
+            seat.hands = []
+            seat.insurance = 0
+        self.dealer = Hand()
+        self.revealed = False
+        print("=============== WELCOME TO BLACKJACK ===============", file=self.out)
+        print(f"PLACE YOUR BETS. Minimum: ${MIN_BET}.", file=self.out)
+        print("-----", file=self.out)
+        if game.SHOW_COUNT:
+            counter = self.deck.counter
+            print(f"RUNNING COUNT: {counter.running:+d}   TRUE COUNT: {counter.true_count:+.1f}", file=self.out)
+        for seat in self.seats:
+            print(f"SEAT {seat.number} WALLET: ${seat.money:.2f}" + ("" if seat.can_bet else " (out)"), file=self.out)
+        self.turn = first
+        return BET
+
+    def place_bet(self, amt):
+        """ Takes the bet typed in for the seat that's up, then asks the next seat. """
+        seat = self.seat
+        amt = amt.strip()
+        if not amt.isdigit():
+            print("Please enter a whole number.", file=self.out)
+            return BET
+        bet = int(amt)
+        if 0 < bet < MIN_BET:
+            print(f"TOO LOW. Minimum bet is ${MIN_BET}.", file=self.out)
+            return BET
+        if bet > seat.money:
+            print(f"TOO HIGH. You only have ${seat.money:.2f} in your wallet.", file=self.out)
+            return BET
+        if bet:
+            seat.hands = [SeatHand(bet)]
+        following = self._next_seat(self.turn + 1, lambda seat: seat.can_bet)
+        if following is not None:
+            self.turn = following
+            return BET
+        if not any(seat.playing for seat in self.seats):
+            print("Nobody bet this round.", file=self.out)
+            return PLAY_AGAIN
+        return DEAL
+
+    def deal(self):
+        """ Deals everyone in at once: the cards come out in one draw, then go around the table
+            the usual way (a card to each seat, the dealer's up card, a second card each, the hole card). """
+        playing = [seat for seat in self.seats if seat.playing]
+        count = len(playing)
+        cards = self._draw(2 * count + 2)
+        for i, seat in enumerate(playing):
+            seat.hands[0].hand.add(cards[i])
+            seat.hands[0].hand.add(cards[count + 1 + i])
+            seat.hands[0].done = seat.hands[0].blackjack
+        self.dealer.add(cards[count])
+        self.dealer.add(cards[2 * count + 1])
+        self.show()
+        if VALUES[self.dealer.cards[0] % 13] == 11:
+#             an ace is showing: insurance, then the dealer checks for a Blackjack
+            self.turn = self._next_seat(0, lambda seat: seat.playing)
+            return INSURANCE
+        return self._first_turn()
+
+    def insure(self, amt):
+        """ Takes the insurance the seat that's up wants (up to half their bet), then asks the next seat. """
+        seat = self.seat
+        try:
+            amt = float(amt)
+        except ValueError:
+            print("That didn't work. Please enter a number.", file=self.out)
+            return INSURANCE
+        if not 0 <= amt <= seat.hands[0].bet / 2:
+            print(f"That didn't work. You can only insure up to ${seat.hands[0].bet / 2:.2f}.", file=self.out)
+            return INSURANCE
+        if seat.committed + amt > seat.money:
+            print(f"You don't have enough money. You only have ${seat.money:.2f}", file=self.out)
+            return INSURANCE
+        seat.insurance = amt
+        following = self._next_seat(self.turn + 1, lambda seat: seat.playing)
+        if following is not None:
+            self.turn = following
+            return INSURANCE
+        return PEEK
+
+    def peek(self):
+        """ With an ace showing, the dealer checks for a Blackjack before anyone plays.
+            If it's there, the round is over and everything gets settled. """
+        if self.dealer.blackjack:
+            self.revealed = True
+            self.show()
+            print("Dealer has a Blackjack!", file=self.out)
+            return SETTLE
+        next_phase = self._first_turn()
+        print("Dealer does not have a Blackjack.", file=self.out)
+        return next_phase
+
+    def _first_turn(self):
+        self.turn = 0
+        self.hand_index = 0
+        return self._next_hand()
+
+    def _next_hand(self):
+        """ Moves on to the next hand that still needs playing (dealing the second card to a freshly
+            split hand on the way) and returns PLAYER_TURN, or DEALER_TURN once every hand is done. """
+        while self.turn < len(self.seats):
+            hands = self.seats[self.turn].hands
+            while self.hand_index < len(hands):
+                seat_hand = hands[self.hand_index]
+                if not seat_hand.done and len(seat_hand.hand) == 1:
+                    seat_hand.hand.add(self._draw(1)[0])
+#                     split aces get just the one card
+                    seat_hand.done = VALUES[seat_hand.hand.cards[0] % 13] == 11
+                if not seat_hand.done and seat_hand.hand.total == 21:
+                    seat_hand.done = True
+                if not seat_hand.done:
+                    self.show(seat_hand)
+                    return PLAYER_TURN
+                self.hand_index += 1
+            self.turn += 1
+            self.hand_index = 0
+        return DEALER_TURN
+
+    def take_turn(self, choice):
+        """ Takes the choice for the hand being played: hit, stand, double down or split. """
+        seat = self.seat
+        seat_hand = seat.hands[self.hand_index]
+        choice = choice.lower().strip()
+        if choice in {'h', 'hit'}:
+            seat_hand.decisions += 'h'
+            seat_hand.hand.add(self._draw(1)[0])
+            seat_hand.done = seat_hand.hand.bust
+        elif choice in {'s', 'stand'}:
+            seat_hand.decisions += 's'
+            seat_hand.done = True
+        elif choice in {'d', 'double down'}:
+            if len(seat_hand.hand) != 2:
+                print("You can only double down on your first two cards.", file=self.out)
+                return PLAYER_TURN
+            if seat.committed + seat_hand.bet > seat.money:
+                print(f"You don't have enough money to double down. You only have ${seat.money:.2f}", file=self.out)
+                return PLAYER_TURN
+            seat_hand.decisions += 'd'
+            seat_hand.bet *= 2
+            seat_hand.hand.add(self._draw(1)[0])
+            seat_hand.done = True
+        elif choice in {'p', 'split'}:
+            if not seat_hand.pair or len(seat.hands) >= MAX_HANDS:
+                print("You can only split a pair.", file=self.out)
+                return PLAYER_TURN
+            if seat.committed + seat_hand.bet > seat.money:
+                print(f"You don't have enough money to split. You only have ${seat.money:.2f}", file=self.out)
+                return PLAYER_TURN
+            first, second = seat_hand.hand.cards
+            seat.hands[self.hand_index:self.hand_index + 1] = [SeatHand(seat_hand.bet, [first], split=True),
+                                                               SeatHand(seat_hand.bet, [second], split=True)]
+        else:
+            print("That didn't work.", file=self.out)
+            return PLAYER_TURN
+        return self._next_hand()
+
+    def dealer_turn(self):
+        """ The dealer shows the hole card, then hits below 17 (unless nobody's left to beat). """
+        self.revealed = True
+        self.show()
+        live = any(not (seat_hand.hand.bust or seat_hand.blackjack)
+                   for seat in self.seats for seat_hand in seat.hands)
+        if live and self.dealer.total < 17:
+            return DEALER_HIT
+        return SETTLE
+
+    def dealer_hit(self):
+        self.dealer.add(self._draw(1)[0])
+        self.show()
+        return DEALER_TURN
+
+    def _result(self, seat_hand):
+        """ What a hand wins (or loses, if negative) against the dealer's final hand. """
+        dealer = self.dealer
+        bet = seat_hand.bet
+        if seat_hand.hand.bust:
+            return -bet
+        if seat_hand.blackjack:
+#             only a tie if the dealer turned up a Blackjack under an ace (the peek); otherwise paid right away
+            return 0 if dealer.blackjack and VALUES[dealer.cards[0] % 13] == 11 else bet * 1.5
+        if dealer.blackjack:
+            return -bet
+        if dealer.bust or seat_hand.hand.total > dealer.total:
+            return bet
+        if seat_hand.hand.total < dealer.total:
+            return -bet
+        return 0
+
+    def settle(self):
+        """ Settles every hand at the table against the dealer's final hand, in one pass. """
+        self.revealed = True
+        dealer_blackjack = self.dealer.blackjack
+        for seat in self.seats:
+            if not seat.playing:
+                continue
+            insured = 0
+            if seat.insurance:
+                insured = seat.insurance * 2 if dealer_blackjack else -seat.insurance
+            for seat_hand in seat.hands:
+                seat_hand.net = self._result(seat_hand)
+            seat.money += sum(seat_hand.net for seat_hand in seat.hands) + insured
+            if self.history is not None:
+                self.log(seat, insured)
+        self.show()
+        print("===============", file=self.out)
+        if self.dealer.bust:
+            print("Dealer total is over 21.", file=self.out)
+        else:
+            print(f"Dealer has {'a Blackjack' if dealer_blackjack else self.dealer.total}.", file=self.out)
+        for seat in self.seats:
+            if seat.playing:
+                net = sum(seat_hand.net for seat_hand in seat.hands)
+                if net > 0:
+                    print(f"SEAT {seat.number}: you win ${net:.2f}! WALLET: ${seat.money:.2f}", file=self.out)
+                elif net < 0:
+                    print(f"SEAT {seat.number}: you lose ${-net:.2f}. WALLET: ${seat.money:.2f}", file=self.out)
+                else:
+                    print(f"SEAT {seat.number}: TIE! WALLET: ${seat.money:.2f}", file=self.out)
+        return PLAY_AGAIN
+
+    def log(self, seat, insured):
+        """ Writes a seat's settled hands to the history (insurance goes with the first one). """
+        dealer_blackjack = self.dealer.blackjack
+        for index, seat_hand in enumerate(seat.hands):
+            insurance = seat.insurance if index == 0 else 0
+            flags = ((PLAYER_BLACKJACK if seat_hand.blackjack else 0)
+                     | (DEALER_BLACKJACK if dealer_blackjack else 0)
+                     | (INSURED if insurance else 0)
+                     | (DOUBLED if 'd' in seat_hand.decisions else 0)
+                     | (SPLIT if seat_hand.split else 0))
+            net = seat_hand.net
+            self.history.add(seat_hand.bet, insurance, net + (insured if index == 0 else 0), seat_hand.decisions,
+                             (net > 0) - (net < 0), flags, seat_hand.hand.cards, self.dealer.cards)
+
+    def play_again(self, again):
+        again = again.lower().strip()
+        if again not in {'y', 'n'}:
+            print("That didn't work.", file=self.out)
+            return PLAY_AGAIN
+        if again == 'y':
+            return START
+        self.quit()
+        return QUIT
+
+    def quit(self):
+        """ Prints out how every seat did and quits the game. """
+        print("\n=============== THANKS FOR PLAYING ===============", file=self.out)
+        for seat in self.seats:
+            change = seat.money - seat.original_money
+            print(f"SEAT {seat.number}: started with ${seat.original_money:.2f}, leaving with ${seat.money:.2f} "
+                  + (f"(lost ${-change:.2f})." if change < 0 else f"(gained ${change:.2f})."), file=self.out)
+        print("\nPlay again! I'm sure you'll win big!", file=self.out)
+        if self.deck is not None:
+            self.deck.close()
+        path = metrics.write()
+        if path is not None:
+            print(f"(Metrics saved to {path}.)")
@@ -0,0 +1,180 @@
+import mmap
+import os
+import struct
+
+from . import analysis
+from .simulation import DOUBLE, HIT, STAND
+
+# Strategy and dealer-outcome tables saved to disk, so they only ever get worked out once per rule set.
+# After that, loading one is just an mmap of the file: nothing is computed or even read until
+# a lookup touches it, and every lookup is a single index into the mapped bytes.
+#
+# File layout (little-endian):
+#   header   magic 'BJST', format version (H), deck count (H), rules (64s, see rules_key)
+#   actions  2*2*32*12 bytes, [first, soft, total, upcard] -> 0 hit / 1 stand / 2 double
+#            (same layout and codes as vectorized.policy_table, so it can be handed straight to NumPy)
+#   evs      2*32*12*3 doubles, [soft, total, upcard] -> stand, hit, double EVs in bets
+#   dealer   12*7 doubles, [upcard] -> chance of 17, 18, 19, 20, 21, bust, blackjack
+# Unused spots (totals under 4, upcards 0-1) are STAND and 0.0.
+#
+# A file whose version or rules don't match is rebuilt, so bumping VERSION (when the layout changes)
+# or changing the rules (when the game's rules change) is all it takes to throw old files out.
+
+MAGIC = b'BJST'
+VERSION = 1
+HEADER = struct.Struct('<4sHH64s')
+
+# the rules the tables are worked out for, as analysis.py and simulation.py play them
+RULES = 'S17,peek-ace,double-first,bj-3:2'
+
+ACTIONS = (HIT, STAND, DOUBLE)
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+ACTIONS_OFFSET = HEADER.size
+ACTIONS_SIZE = 2 * 2 * 32 * 12
+EVS_OFFSET = ACTIONS_OFFSET + ACTIONS_SIZE
+EVS_SIZE = 2 * 32 * 12 * 3 * 8
+DEALER_OFFSET = EVS_OFFSET + EVS_SIZE
+DEALER_SIZE = 12 * 7 * 8
+FILE_SIZE = DEALER_OFFSET + DEALER_SIZE
+
+# where the files go
+TABLE_DIR = os.environ.get("BLACKJACK_TABLE_DIR", os.path.join(os.path.expanduser('~'), '.blackjack', 'tables'))
+
+# tables already loaded, by path
+_tables = {}
+
+
+def rules_key(deck_count):
+    key = f'{deck_count}D,{RULES}'.encode()
+    if len(key) > 64:
+        raise ValueError(f"rules key {key!r} doesn't fit in the header")
+    return key
+
+
+def table_path(deck_count=1, directory=None):
+    return os.path.join(directory or TABLE_DIR, f'strategy-{deck_count}d-v{VERSION}.bin')
+
+
+def build(deck_count=1):
+    """ Works out the tables for a deck count and returns the file contents. Takes a few seconds. """
+    strategy = analysis.strategy_table(deck_count)
+    actions = bytearray([ACTION_CODES[STAND]]) * ACTIONS_SIZE
+    evs = [0.0] * (2 * 32 * 12 * 3)
+    for (total, soft, upcard), (action, action_evs) in strategy.items():
+        later = HIT if action_evs[HIT] > action_evs[STAND] else STAND
+        actions[_action_index(True, soft, total, upcard)] = ACTION_CODES[action]
+        actions[_action_index(False, soft, total, upcard)] = ACTION_CODES[later]
+        i = _ev_index(soft, total, upcard)
+        evs[i:i + 3] = action_evs[STAND], action_evs[HIT], action_evs[DOUBLE]
+    dealer = [0.0] * (12 * 7)
+    for upcard in analysis.UPCARDS:
+        dealer[upcard * 7:upcard * 7 + 7] = analysis.dealer_outcomes(upcard, deck_count).values()
+    analysis.clear_cache()
+    return b''.join((HEADER.pack(MAGIC, VERSION, deck_count, rules_key(deck_count)), actions,
+                     struct.pack(f'<{len(evs)}d', *evs), struct.pack(f'<{len(dealer)}d', *dealer)))
+
+
+def save(deck_count=1, directory=None):
+    """ Builds the tables for a deck count and writes them out. Returns the path. """
+    path = table_path(deck_count, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = build(deck_count)
+#     write to a temp file and swap it in, so nobody ever maps a half-written table
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return path
+
+
+def _action_index(first, soft, total, upcard):
+    return ((first * 2 + soft) * 32 + total) * 12 + upcard
+
+
+def _ev_index(soft, total, upcard):
+    return ((soft * 32 + total) * 12 + upcard) * 3
+
+
+class StrategyTable:
+    """ A saved table, mapped into memory. Also works as a simulation policy:
+        table(total, soft, upcard, first) returns HIT, STAND or DOUBLE. """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) != FILE_SIZE:
+            self.map.close()
+            raise ValueError(f"{path} isn't a strategy table")
+        magic, self.version, self.deck_count, self.rules = HEADER.unpack_from(self.map)
+        self.rules = self.rules.rstrip(b'\0')
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} isn't a strategy table")
+        view = memoryview(self.map)
+        self.evs_view = view[EVS_OFFSET:DEALER_OFFSET].cast('d')
+        self.dealer_view = view[DEALER_OFFSET:FILE_SIZE].cast('d')
+
+    def __call__(self, total, soft, upcard, first):
+        return ACTIONS[self.map[ACTIONS_OFFSET + ((first * 2 + soft) * 32 + total) * 12 + upcard]]
+
+    action = __call__
+
+    def evs(self, total, soft, upcard):
+        """ Returns {STAND: ev, HIT: ev, DOUBLE: ev} for a player total against an upcard. """
+        i = _ev_index(soft, total, upcard)
+        return dict(zip((STAND, HIT, DOUBLE), self.evs_view[i:i + 3]))
+
+    def dealer(self, upcard):
+        """ Returns the chances of each dealer result (see analysis.OUTCOMES) for an upcard. """
+        return dict(zip(analysis.OUTCOMES, self.dealer_view[upcard * 7:upcard * 7 + 7]))
+
+    def actions(self):
+        """ The raw action bytes, [first, soft, total, upcard] (np.frombuffer(...).reshape(2, 2, 32, 12)). """
+        return memoryview(self.map)[ACTIONS_OFFSET:EVS_OFFSET]
+
+    def close(self):
+        """ Unmaps the file. The next load() maps it again. """
+        if _tables.get(self.path) is self:
+            del _tables[self.path]
+        self.evs_view = self.dealer_view = None
+        self.map.close()
+
+    def __reduce__(self):
+#         mmaps can't be pickled, so worker processes (see parallel.py) just map the file again
+        return load_path, (self.path,)
+
+
+def load_path(path):
+    table = _tables.get(path)
+    if table is None:
+        table = _tables[path] = StrategyTable(path)
+    return table
+
+
+def load(deck_count=1, directory=None, build_missing=True):
+    """ Returns the StrategyTable for a deck count, building and saving it first if there isn't
+        an up-to-date one on disk yet (or raising FileNotFoundError if build_missing is False). """
+    path = table_path(deck_count, directory)
+    if path in _tables:
+        return _tables[path]
+    try:
+        table = StrategyTable(path)
+        if table.version == VERSION and table.rules == rules_key(deck_count):
+            _tables[path] = table
+            return table
+        table.close()
+    except (FileNotFoundError, ValueError):
+        if not build_missing:
+            raise FileNotFoundError(f"no strategy table for {deck_count} deck(s) at {path}")
+    if not build_missing:
+        raise FileNotFoundError(f"strategy table at {path} is out of date")
+    save(deck_count, directory)
+    return load_path(path)
+
+
+if __name__ == "__main__":
+    import sys
+    for count in sys.argv[1:] or ['1']:
+        print(save(int(count)))
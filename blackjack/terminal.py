@@ -0,0 +1,90 @@
+import os
+import shutil
+import sys
+
+# Clearing and moving around the screen from inside the game, with ANSI escape sequences,
+# instead of starting a shell for every os.system('cls') (which doesn't even exist outside Windows).
+# When the output isn't a terminal (piped to a file, a test, a socket), clears are skipped.
+#
+# A Terminal also counts the lines that have gone past on it (everything written, plus the Enter
+# at the end of each answer typed in), so render.Screen can tell when the text under a frame
+# has scrolled the frame up.
+
+HOME = '\x1b[H'
+CLEAR_SCREEN = '\x1b[2J'
+CLEAR_LINE = '\x1b[K'
+CLEAR_BELOW = '\x1b[J'
+
+
+def move_to(row):
+    """ Moves the cursor to the start of 'row' (counting from 0). """
+    return f'\x1b[{row + 1};1H'
+
+
+def enable_ansi():
+    """ Windows consoles have to be told to understand ANSI escapes (Windows 10 and up).
+        Returns True if escapes will work. """
+    if os.name != 'nt':
+        return True
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)   # stdout
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+#         ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+
+class Terminal:
+    """ The screen the game is drawn on.
+            ansi = True if it's a real terminal that understands escape sequences
+                   (worked out from the stream unless it's given)
+            rows = how many lines fit on it (default: asked of the terminal each time, or 24
+                   if it isn't one, like a telnet client) """
+
+    def __init__(self, stream=None, ansi=None, rows=None):
+        self.stream = stream or sys.stdout
+        isatty = getattr(self.stream, 'isatty', None)
+        self.isatty = bool(isatty and isatty())
+        if ansi is None:
+            ansi = self.isatty and enable_ansi()
+        self.ansi = ansi
+        self.rows = rows
+        # lines that have gone past, ever (see render.Screen)
+        self.newlines = 0
+
+    @property
+    def height(self):
+        if self.rows is not None:
+            return self.rows
+        if self.isatty:
+            return shutil.get_terminal_size().lines
+        return 24
+
+    def write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+        self.newlines += text.count('\n')
+
+    def entered(self):
+        """ Notes that an answer was typed in (the Enter after it moves everything down a line). """
+        self.newlines += 1
+
+    def input(self, prompt=''):
+        """ Asks 'prompt' and returns the line typed in. """
+        self.write(prompt)
+        answer = input()
+        self.entered()
+        return answer
+
+    def clear(self):
+        """ Clears the screen and puts the cursor in the top left (does nothing if it's not a terminal). """
+        if self.ansi:
+            self.write(HOME + CLEAR_SCREEN)
+
+
+terminal = Terminal()
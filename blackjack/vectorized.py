@@ -0,0 +1,170 @@
+import numpy as np
+
+from . import simulation
+from .simulation import HIT, STAND, DOUBLE, Stats
+
+# Batch version of the hand math and the simulator, using NumPy.
+# Instead of one Python object per hand, a batch of hands is a few int arrays:
+#   cards = (hands, max cards) card values, 1 for ace, 2-10, 0 for "no card"
+#   hard = total counting every ace as 1, aces = True if the hand has an ace
+# A hand's real total is hard + 10 when it has an ace and that doesn't bust it (soft).
+# Plays by the same rules as simulation.Simulator, without insurance.
+
+# table actions
+A_HIT, A_STAND, A_DOUBLE = 0, 1, 2
+ACTIONS = {HIT: A_HIT, STAND: A_STAND, DOUBLE: A_DOUBLE}
+
+# cards of each value (1-10) in one deck
+DECK_COUNTS = np.array([4, 4, 4, 4, 4, 4, 4, 4, 4, 16], dtype=np.int16)
+
+
+def encode(hands, width=None):
+    """ Takes in a list of hands of int cards (0-51, see shoe.py)
+        and returns them as a (hands, width) array of card values. """
+    width = width or max((len(hand) for hand in hands), default=0)
+    cards = np.zeros((len(hands), width), dtype=np.int8)
+    for i, hand in enumerate(hands):
+        cards[i, :len(hand)] = [min(card % 13 + 1, 10) for card in hand]
+    return cards
+
+
+def best_totals(hard, aces):
+    """ Returns (total, soft) arrays from hard totals and has-an-ace flags. """
+    soft = aces & (hard <= 11)
+    return hard + 10 * soft, soft
+
+
+def hand_totals(cards):
+    """ Returns (total, soft) for every hand in an encoded batch. """
+    return best_totals(cards.sum(axis=1, dtype=np.int16), (cards == 1).any(axis=1))
+
+
+def blackjack_flags(cards):
+    """ True for every hand that's exactly two cards worth 21. """
+    total, _ = hand_totals(cards)
+    return (total == 21) & ((cards > 0).sum(axis=1) == 2)
+
+
+def bust_flags(cards):
+    """ True for every hand over 21. """
+    return hand_totals(cards)[0] > 21
+
+
+def policy_table(policy=simulation.basic_strategy):
+    """ Turns a simulation policy(total, soft, upcard, first) into a lookup array
+        indexed [first, soft, total, upcard] (upcard 2-11, ace = 11). """
+    table = np.full((2, 2, 32, 12), A_STAND, dtype=np.int8)
+    for first in (0, 1):
+        for soft in (0, 1):
+            for total in range(4, 22):
+                for upcard in range(2, 12):
+                    table[first, soft, total, upcard] = ACTIONS[policy(total, bool(soft), upcard, bool(first))]
+    return table
+
+
+class ShoeBatch:
+    """ One fresh shoe per hand, dealt without replacement, for a whole batch at once.
+        Only the counts of each card value are kept, so drawing a card is a
+        weighted pick from what's left in that hand's shoe. """
+
+    def __init__(self, rng, hands, deck_count=1):
+        self.rng = rng
+        self.counts = np.tile(DECK_COUNTS * deck_count, (hands, 1))
+        self.remaining = np.full(hands, 52 * deck_count, dtype=np.int16)
+
+    def draw(self, rows):
+        """ Draws one card for each hand in 'rows' (an index array) and returns the values. """
+        counts = self.counts[rows]
+        pick = (self.rng.random(len(rows)) * self.remaining[rows]).astype(np.int16)
+        idx = (counts.cumsum(axis=1) <= pick[:, None]).sum(axis=1)
+        self.counts[rows, idx] -= 1
+        self.remaining[rows] -= 1
+        return (idx + 1).astype(np.int16)
+
+
+def dealer_play(hard, aces, shoe, rows):
+    """ Plays the dealer's hand for every hand in 'rows': hit below 17, stand on all 17s.
+        'hard' and 'aces' are updated in place; returns the final totals (over 21 = bust). """
+    while True:
+        total, _ = best_totals(hard[rows], aces[rows])
+        rows = rows[total < 17]
+        if not len(rows):
+            break
+        card = shoe.draw(rows)
+        hard[rows] += card
+        aces[rows] |= card == 1
+    return best_totals(hard, aces)[0]
+
+
+def play_batch(rng, hands, table, deck_count=1):
+    """ Plays 'hands' hands at once and returns each hand's result in half-bets, whether it was
+        a Blackjack that got paid (not one that tied a dealer Blackjack), and whether it doubled. """
+    shoe = ShoeBatch(rng, hands, deck_count)
+    everyone = np.arange(hands)
+    p1, up, p2, hole = (shoe.draw(everyone) for _ in range(4))
+    hard = p1 + p2
+    aces = (p1 == 1) | (p2 == 1)
+    d_hard = up + hole
+    d_aces = (up == 1) | (hole == 1)
+    player_bj = aces & (hard == 11)
+    dealer_bj = d_aces & (d_hard == 11)
+
+    net = np.zeros(hands, dtype=np.int64)
+    bet = np.full(hands, 2, dtype=np.int64)
+    done = np.zeros(hands, dtype=bool)
+#     dealer shows an ace and has a Blackjack: round over
+    peek = (up == 1) & dealer_bj
+    net[peek & ~player_bj] = -2
+    done |= peek
+#     player Blackjack pays 1.5x
+    net[~done & player_bj] = 3
+    done |= player_bj
+
+#     player's turn
+    upcard = np.where(up == 1, 11, up)
+    first = np.ones(hands, dtype=np.int8)
+    rows = np.flatnonzero(~done)
+    while len(rows):
+        total, soft = best_totals(hard[rows], aces[rows])
+        action = table[first[rows], soft.astype(np.int8), total, upcard[rows]]
+        rows = rows[action != A_STAND]
+        action = action[action != A_STAND]
+        if not len(rows):
+            break
+        card = shoe.draw(rows)
+        hard[rows] += card
+        aces[rows] |= card == 1
+        bet[rows[action == A_DOUBLE]] = 4
+        first[rows] = 0
+        busted = best_totals(hard[rows], aces[rows])[0] > 21
+        net[rows[busted]] = -bet[rows[busted]]
+        done[rows[busted]] = True
+        rows = rows[~busted & (action == A_HIT)]
+
+#     dealer's turn, for everyone still in
+    rows = np.flatnonzero(~done)
+    dealer = dealer_play(d_hard, d_aces, shoe, rows)[rows]
+    player = best_totals(hard[rows], aces[rows])[0]
+    won = (dealer > 21) | (player > dealer)
+    lost = ~won & ((player < dealer) | dealer_bj[rows])
+    net[rows] = np.where(won, bet[rows], np.where(lost, -bet[rows], 0))
+    return net, player_bj & ~peek, bet == 4
+
+
+def simulate(hands, policy=simulation.basic_strategy, deck_count=1, seed=None, batch_size=250_000):
+    """ Plays 'hands' hands in batches and returns the same Stats as simulation.simulate. """
+    rng = np.random.default_rng(seed)
+    table = policy_table(policy)
+    stats = Stats()
+    while stats.hands < hands:
+        size = min(batch_size, hands - stats.hands)
+        net, blackjacks, doubles = play_batch(rng, size, table, deck_count)
+        stats.hands += size
+        stats.wins += int((net > 0).sum())
+        stats.losses += int((net < 0).sum())
+        stats.pushes += int((net == 0).sum())
+        stats.blackjacks += int(blackjacks.sum())
+        stats.doubles += int(doubles.sum())
+        stats.net += int(net.sum())
+        stats.net_sq += int((net * net).sum())
+    return stats
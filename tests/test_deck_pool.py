@@ -0,0 +1,17 @@
+import itertools
+
+import pytest
+
+from blackjack.deck_pool import DeckError, DeckPool
+
+
+def test_acquire_gives_up_when_decks_cant_be_made():
+    pool = DeckPool(lambda: None, lambda deck_id: None, size=1, max_failures=2)
+    with pytest.raises(DeckError):
+        pool.acquire()
+
+
+def test_acquire_hands_out_decks():
+    ids = itertools.count()
+    pool = DeckPool(lambda: next(ids), lambda deck_id: deck_id, size=2)
+    assert {pool.acquire(), pool.acquire()} == {0, 1}
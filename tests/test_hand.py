@@ -0,0 +1,12 @@
+from blackjack.hand import CARDS_BY_CODE, Hand
+
+
+def cards(*codes):
+    return [CARDS_BY_CODE[code] for code in codes]
+
+
+def test_soft_21_drawing_an_ace():
+    hand = Hand(cards('AS', '5S', '5D'))
+    assert (hand.total, hand.soft_aces) == (21, 1)
+    hand.add(CARDS_BY_CODE['AD'])
+    assert (hand.total, hand.soft_aces, hand.bust) == (12, 0, False)
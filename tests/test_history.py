@@ -0,0 +1,66 @@
+import io
+import random
+
+import pytest
+
+from blackjack import game as bj
+from blackjack import render
+from blackjack.history import HistoryWriter, read_records
+from blackjack.table import TableGame
+from blackjack.terminal import Terminal
+
+# a scripted player for each phase that asks something (anything it gets wrong is just asked again)
+ANSWERS = {
+    bj.BET: lambda rng: str(rng.choice((5, 10, 25))),
+    bj.INSURANCE: lambda rng: rng.choice('yn'),
+    bj.INSURANCE_AMOUNT: lambda rng: str(rng.choice((0, 1, 2))),
+    bj.PLAYER_TURN: lambda rng: rng.choice('hhssdp'),
+    bj.PLAY_AGAIN: lambda rng: 'y',
+}
+# a table asks for the insurance amount straight away
+TABLE_ANSWERS = dict(ANSWERS, **{bj.INSURANCE: ANSWERS[bj.INSURANCE_AMOUNT]})
+
+
+@pytest.fixture
+def local_decks(monkeypatch):
+    monkeypatch.setattr(bj, 'DECK_BACKEND', 'local')
+    monkeypatch.setattr(bj, 'deck_pool', None)
+
+
+def play(game, rounds, answers=ANSWERS, seed=0):
+    rng = random.Random(seed)
+    played = 0
+    while played < rounds:
+        if game.prompt is None:
+            game.step()
+            continue
+        if game.phase == bj.PLAY_AGAIN:
+            played += 1
+        game.step(answers[game.phase](rng))
+
+
+def screen():
+    return render.Screen(Terminal(io.StringIO(), ansi=False))
+
+
+def test_history_adds_up_to_the_wallet(local_decks, tmp_path):
+    path = str(tmp_path / 'hands.bjh')
+    history = HistoryWriter(path)
+    player = bj.Player(None, 10_000, 0)
+    dealer = bj.Dealer(None, player)
+    dealer.screen = screen()
+    play(bj.Game(dealer, player, pace=0, history=history), 300)
+    history.close()
+    records = list(read_records(path))
+    assert len(records) == 300
+    assert sum(record['net'] for record in records) == round((player.money - player.original_money) * 100)
+
+
+def test_table_history_adds_up_to_the_wallets(local_decks, tmp_path):
+    path = str(tmp_path / 'hands.bjh')
+    history = HistoryWriter(path)
+    table = TableGame(3, 10_000, pace=0, history=history, screen=screen())
+    play(table, 200, TABLE_ANSWERS)
+    history.close()
+    change = sum(seat.money - seat.original_money for seat in table.seats)
+    assert sum(record['net'] for record in read_records(path)) == round(change * 100)
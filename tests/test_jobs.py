@@ -0,0 +1,32 @@
+from blackjack.jobs import Job
+from blackjack.simulation import Stats
+
+
+def totals(job):
+    return {name: getattr(job.stats, name) for name in Stats.__slots__}
+
+
+def test_resumed_job_matches_a_straight_run(tmp_path):
+    rules = dict(seed=7, streams=3, chunk=2_000, deck_count=6, penetration=0.75)
+    straight = Job(str(tmp_path / 'straight.json'), **rules)
+    assert straight.run(30_000) == 'hands'
+
+    path = str(tmp_path / 'resumed.json')
+    first = Job(path, **rules)
+    first.run(12_000)
+    resumed = Job(path)
+    assert resumed.stats.hands == 12_000
+    assert resumed.run(30_000) == 'hands'
+    assert totals(resumed) == totals(straight)
+
+
+def test_stopped_job_picks_up_where_it_left_off(tmp_path):
+    path = str(tmp_path / 'job.json')
+    job = Job(path, seed=1, chunk=1_000)
+    assert job.run(20_000, on_progress=lambda progress: job.stop()) == 'stopped'
+    assert 0 < Job(path).stats.hands == job.stats.hands < 20_000
+    Job(path).run(20_000)
+
+    straight = Job(str(tmp_path / 'straight.json'), seed=1, chunk=1_000)
+    straight.run(20_000)
+    assert totals(Job(path)) == totals(straight)
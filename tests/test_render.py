@@ -0,0 +1,43 @@
+import io
+
+from blackjack import render
+from blackjack.terminal import CLEAR_SCREEN, Terminal
+
+
+def screen(rows=24):
+    out = io.StringIO()
+    return render.Screen(Terminal(out, ansi=True, rows=rows)), out
+
+
+def redraw(screen, out, frame):
+    out.seek(0)
+    out.truncate()
+    screen.draw(frame)
+    return out.getvalue()
+
+
+def test_redraw_only_sends_changed_lines():
+    s, out = screen()
+    frame = [f"line {i}" for i in range(12)]
+    s.draw(frame)
+    s.term.write("That didn't work.\n")
+    sent = redraw(s, out, frame[:5] + ["changed"] + frame[6:])
+    assert CLEAR_SCREEN not in sent
+    assert "changed" in sent and "line 4" not in sent
+
+
+def test_text_that_scrolls_the_frame_forces_a_full_redraw():
+    s, out = screen()
+    frame = [f"line {i}" for i in range(12)]
+    s.draw(frame)
+    for _ in range(8):
+        s.term.write("That didn't work.\nWhat would you like to do? ")
+        s.term.entered()
+    assert CLEAR_SCREEN in redraw(s, out, frame[:5] + ["changed"] + frame[6:])
+
+
+def test_frame_taller_than_the_terminal_is_always_drawn_in_full():
+    s, out = screen(rows=24)
+    frame = [f"line {i}" for i in range(30)]
+    s.draw(frame)
+    assert CLEAR_SCREEN in redraw(s, out, frame[:-1] + ["changed"])
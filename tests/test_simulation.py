@@ -0,0 +1,21 @@
+from blackjack.simulation import HIT, STAND, Simulator
+
+
+def rigged(cards, policy):
+    sim = Simulator(policy=policy)
+    sim.draw = iter(cards).__next__
+    return sim
+
+
+def test_soft_21_drawing_an_ace():
+    # player A-5, dealer 6 up and 10 down; player hits a 5 (soft 21) and an ace (12), the dealer busts
+    hits = iter([HIT, HIT])
+    sim = rigged([11, 6, 5, 10, 5, 11, 10], lambda total, soft, upcard, first: next(hits, STAND))
+    assert sim.play_hand() == 2
+
+
+def test_two_aces_dealt():
+    # A-A is a soft 12, and a 9 makes it 21
+    hits = iter([HIT])
+    sim = rigged([11, 10, 11, 7, 9], lambda total, soft, upcard, first: next(hits, STAND))
+    assert sim.play_hand() == 2
@@ -0,0 +1,19 @@
+import io
+
+from blackjack import render
+from blackjack.table import MAX_SEATS, SeatHand, TableGame
+from blackjack.terminal import Terminal
+
+
+def test_big_table_fits_on_the_terminal():
+    screen = render.Screen(Terminal(io.StringIO(), ansi=True, rows=24))
+    game = TableGame(MAX_SEATS, pace=0, screen=screen)
+    game.dealer.add(0)
+    game.dealer.add(20)
+    for number, seat in enumerate(game.seats):
+        seat.hands = [SeatHand(10, [number, number + 13])]
+    active = game.seats[1].hands[0]
+    game.show(active)
+    assert len(screen.lines) < 24
+    assert any(line.endswith("<--") for line in screen.lines)
+    assert "SEAT 7 ($100.00): 7♠ 7♦  14  BET $10.00" in screen.lines
@@ -0,0 +1,42 @@
+import pytest
+
+from blackjack import analysis, tables
+from blackjack.simulation import HIT, STAND
+
+
+@pytest.fixture(scope='module')
+def strategy():
+    return analysis.strategy_table(1)
+
+
+def test_saved_table_matches_the_analysis(tmp_path, strategy):
+    table = tables.load(1, tmp_path)
+    policy = analysis.TablePolicy(strategy)
+    for (total, soft, upcard), (action, evs) in strategy.items():
+        assert table(total, soft, upcard, True) == action
+        assert table(total, soft, upcard, False) == policy(total, soft, upcard, False)
+        assert table.evs(total, soft, upcard) == pytest.approx(evs)
+    for upcard in analysis.UPCARDS:
+        assert table.dealer(upcard) == pytest.approx(analysis.dealer_outcomes(upcard, 1))
+    table.close()
+
+
+def test_truncated_table_is_rebuilt(tmp_path):
+    path = tables.table_path(1, tmp_path)
+    with open(path, 'wb') as f:
+        f.write(b'junk')
+    with pytest.raises(FileNotFoundError):
+        tables.load(1, tmp_path, build_missing=False)
+    table = tables.load(1, tmp_path)
+    assert table(16, False, 10, True) == HIT
+    table.close()
+
+
+def test_closed_table_is_mapped_again(tmp_path):
+    table = tables.load(1, tmp_path)
+    table.close()
+    again = tables.load(1, tmp_path)
+    assert again is not table
+    assert again(16, False, 10, True) == HIT
+    assert again(20, False, 10, True) == STAND
+    again.close()
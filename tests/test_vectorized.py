@@ -0,0 +1,34 @@
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from blackjack import analysis, simulation, vectorized  # noqa: E402
+from blackjack.hand import Hand  # noqa: E402
+
+
+def test_hand_totals_match_hand():
+    rng = random.Random(3)
+    hands = [rng.sample(range(52), rng.randint(2, 8)) for _ in range(2_000)]
+    total, soft = vectorized.hand_totals(vectorized.encode(hands))
+    for i, cards in enumerate(hands):
+        hand = Hand(cards)
+        assert (total[i], bool(soft[i])) == (hand.total, hand.soft)
+
+
+def test_ev_matches_the_scalar_simulator():
+    hands = 400_000
+    batch = vectorized.simulate(hands, seed=1)
+    scalar = simulation.simulate(hands, seed=1)
+    spread = math.sqrt((batch.variance + scalar.variance) / hands)
+    assert abs(batch.ev - scalar.ev) < 4 * spread
+    rate = scalar.blackjack_rate
+    assert abs(batch.blackjack_rate - rate) < 4 * math.sqrt(2 * rate * (1 - rate) / hands)
+
+
+def test_exact_strategy_drives_the_batch_simulator():
+    table = vectorized.policy_table(analysis.TablePolicy(analysis.strategy_table(1)))
+    assert table.shape == (2, 2, 32, 12)
+    assert vectorized.simulate(10_000, policy=analysis.TablePolicy(analysis.strategy_table(1)), seed=0).hands == 10_000